@@ -0,0 +1,105 @@
+"""
+Load test of the /ws/market broadcaster with simulated clients (no sockets).
+
+A share of the clients are slow consumers whose every send takes
+SLOW_SEND_SECONDS; the run shows that fast clients still get each tick
+promptly and that slow clients' backlogs stay bounded.
+
+Run from the repository root:
+    python -m backend.api.benchmark_market_stream
+"""
+
+import asyncio
+import random
+import time
+
+from backend.api.market_stream import DEFAULT_TOPIC, MarketBroadcaster
+
+N_CLIENTS = 5000
+N_TOPICS = 50
+SLOW_SHARE = 0.05
+SLOW_SEND_SECONDS = 0.5
+N_TICKS = 20
+TICK_SECONDS = 0.05
+
+
+class FakeWebSocket:
+
+    def __init__(self, slow):
+        self.slow = slow
+        self.received = 0
+        self.last_message = None
+
+    async def send_json(self, message):
+        if self.slow:
+            await asyncio.sleep(SLOW_SEND_SECONDS)
+        self.received += 1
+        self.last_message = message
+
+
+def tick_message(topic, tick):
+    return {
+        "commodity": topic[0],
+        "market": topic[1],
+        "price": 2000 + tick,
+        "change": tick % 7,
+        "forecast": "Live"
+    }
+
+
+async def main():
+
+    rng = random.Random(42)
+    topics = [DEFAULT_TOPIC] + [(f"Crop{i}", f"Mandi{i}") for i in range(1, N_TOPICS)]
+
+    broadcaster = MarketBroadcaster(fetch_latest=lambda commodity, market: None)
+    sockets = []
+
+    for _ in range(N_CLIENTS):
+        ws = FakeWebSocket(slow=rng.random() < SLOW_SHARE)
+        channel = broadcaster.register(ws)
+        broadcaster.subscribe(channel, *DEFAULT_TOPIC)
+        broadcaster.subscribe(channel, *rng.choice(topics))
+        sockets.append(ws)
+
+    fast = [ws for ws in sockets if not ws.slow]
+    slow = [ws for ws in sockets if ws.slow]
+
+    print(f"{N_CLIENTS} clients ({len(slow)} slow, {SLOW_SEND_SECONDS * 1000:.0f} ms per send), "
+          f"{N_TOPICS} topics, {N_TICKS} ticks every {TICK_SECONDS * 1000:.0f} ms\n")
+
+    publish_seconds = []
+    fanout_seconds = []
+
+    for tick in range(N_TICKS):
+
+        start = time.perf_counter()
+        for topic in topics:
+            broadcaster.publish(topic, tick_message(topic, tick))
+        publish_seconds.append(time.perf_counter() - start)
+
+        # Time until every fast client has drained its queue
+        while any(broadcaster.channels[ws].pending for ws in fast):
+            await asyncio.sleep(0)
+        fanout_seconds.append(time.perf_counter() - start)
+
+        await asyncio.sleep(TICK_SECONDS)
+
+    stats = broadcaster.stats()
+    max_pending = max(len(c.pending) + len(c.resync) for c in broadcaster.channels.values())
+    current = sum(ws.last_message is not None and ws.last_message.get("price") == 2000 + N_TICKS - 1 for ws in fast)
+
+    print(f"publish (all topics), mean : {sum(publish_seconds) / N_TICKS * 1000:8.2f} ms")
+    print(f"fan-out to fast clients, p50: {sorted(fanout_seconds)[N_TICKS // 2] * 1000:8.2f} ms")
+    print(f"fan-out to fast clients, max: {max(fanout_seconds) * 1000:8.2f} ms")
+    print(f"fast clients on latest tick  : {current}/{len(fast)}")
+    print(f"messages sent                : {stats['sent']}")
+    print(f"stale ticks merged (slow)    : {stats['coalesced']}")
+    print(f"largest client backlog       : {max_pending} topics")
+
+    for channel in list(broadcaster.channels.values()):
+        broadcaster.unregister(channel)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
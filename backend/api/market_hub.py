@@ -0,0 +1,252 @@
+"""
+Cross-worker hub for live market ticks on a single host, no broker needed.
+
+Every uvicorn worker runs MarketHub.run(). Workers race for an exclusive
+flock on HUB_DIR/hub.lock; the winner becomes the producer: it alone
+polls prices (and runs the producer-only jobs, e.g. the warehouse sync)
+and serves a Unix socket at HUB_DIR/hub.sock. The other workers connect as
+subscribers and feed what they receive into their own MarketBroadcaster,
+so every /ws/market client sees the same ticks whichever worker it hit.
+
+Wire format is newline-delimited JSON:
+    worker -> producer   {"action": "subscribe" | "unsubscribe", "commodity": ..., "market": ...}
+    producer -> worker   {"topic": [commodity, market], "message": {...}}
+    either way           {"event": name}
+
+The kernel drops the flock when the producer process dies; subscribers
+see their socket close, and the first one to grab the lock takes over.
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # not on Unix: every worker runs standalone
+    fcntl = None
+
+from backend.api.market_stream import topic_key
+
+HUB_DIR = os.getenv("MARKET_HUB_DIR", os.path.join(tempfile.gettempdir(), "farmplus-market-hub"))
+
+RETRY_SECONDS = 1.0
+
+# A subscriber worker this far behind is disconnected (it reconnects and resubscribes)
+MAX_PEER_BUFFER = 1 << 20
+
+
+def encode(message):
+    return (json.dumps(message) + "\n").encode("utf-8")
+
+
+class MarketHub:
+
+    def __init__(self, broadcaster, hub_dir=HUB_DIR):
+
+        self.broadcaster = broadcaster
+        broadcaster.topic_listener = self._local_topic_changed
+
+        self.hub_dir = hub_dir
+        self.lock_path = os.path.join(hub_dir, "hub.lock")
+        self.socket_path = os.path.join(hub_dir, "hub.sock")
+
+        self.role = "starting"
+        self.peers = {}  # producer: writer -> topics that worker wants
+        self.upstream = None  # subscriber: writer to the producer
+        self.producer_jobs = []
+        self.event_handlers = {}
+
+        self.elections = 0
+        self.reconnects = 0
+        self._lock_file = None
+
+    # Events
+
+    def on_event(self, name, handler):
+        """
+        Registers an async handler run in every worker when name is notified.
+        """
+        self.event_handlers.setdefault(name, []).append(handler)
+
+    def _dispatch(self, name):
+        for handler in self.event_handlers.get(name, ()):
+            asyncio.ensure_future(handler())
+
+    def notify(self, name):
+        """
+        Runs name's handlers in this worker and in every other one.
+        """
+
+        self._dispatch(name)
+
+        if self.role == "producer":
+            for writer in list(self.peers):
+                self._write(writer, {"event": name})
+        elif self.upstream is not None:
+            self._write(self.upstream, {"event": name})
+
+    # Election
+
+    def _try_acquire(self):
+
+        if fcntl is None or self._lock_file is not None:
+            return True
+
+        os.makedirs(self.hub_dir, exist_ok=True)
+        lock_file = open(self.lock_path, "a+")
+
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+
+        # Held (and the lock with it) for the life of the process
+        self._lock_file = lock_file
+
+        return True
+
+    async def run(self):
+
+        while True:
+
+            if self._try_acquire():
+                self.elections += 1
+                await self._run_producer()
+
+            try:
+                await self._run_subscriber()
+            except (OSError, ValueError):
+                pass
+
+            self.upstream = None
+            await asyncio.sleep(RETRY_SECONDS)
+
+    # Producer side
+
+    def _write(self, writer, message):
+
+        if writer.transport.get_write_buffer_size() > MAX_PEER_BUFFER:
+            writer.close()
+            return
+
+        writer.write(encode(message))
+
+    def _wanted_topics(self):
+
+        topics = set(self.broadcaster.subscribers)
+
+        for peer_topics in self.peers.values():
+            topics |= peer_topics
+
+        return topics
+
+    async def _serve_peer(self, reader, writer):
+
+        self.peers[writer] = set()
+
+        try:
+            async for line in reader:
+                request = json.loads(line)
+
+                if "event" in request:
+                    self._dispatch(request["event"])
+                    for other in list(self.peers):
+                        if other is not writer:
+                            self._write(other, request)
+                    continue
+
+                topic = topic_key(request["commodity"], request["market"])
+
+                if request.get("action") == "subscribe":
+                    self.peers[writer].add(topic)
+                    snapshot = self.broadcaster.snapshots.get(topic)
+                    if snapshot is not None:
+                        self._write(writer, {"topic": list(topic), "message": snapshot})
+                elif request.get("action") == "unsubscribe":
+                    self.peers[writer].discard(topic)
+        except (OSError, ValueError, KeyError):
+            pass
+        finally:
+            self.peers.pop(writer, None)
+            writer.close()
+
+    async def _run_producer(self):
+
+        self.role = "producer"
+        server = None
+
+        if fcntl is not None:
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            server = await asyncio.start_unix_server(self._serve_peer, path=self.socket_path)
+
+        jobs = [asyncio.create_task(job()) for job in self.producer_jobs]
+
+        try:
+            while True:
+                try:
+                    changed = await self.broadcaster.poll_once(self._wanted_topics())
+                    for topic, message in changed.items():
+                        for writer, topics in list(self.peers.items()):
+                            if topic in topics:
+                                self._write(writer, {"topic": list(topic), "message": message})
+                except Exception as e:
+                    print(f"Market price broadcast error: {e}")
+                await asyncio.sleep(self.broadcaster.interval)
+        finally:
+            for job in jobs:
+                job.cancel()
+            if server is not None:
+                server.close()
+
+    # Subscriber side
+
+    def _local_topic_changed(self, topic, subscribed):
+
+        if self.upstream is not None:
+            self._write(self.upstream, {
+                "action": "subscribe" if subscribed else "unsubscribe",
+                "commodity": topic[0],
+                "market": topic[1]
+            })
+
+    async def _run_subscriber(self):
+
+        reader, writer = await asyncio.open_unix_connection(self.socket_path)
+
+        self.role = "subscriber"
+        self.upstream = writer
+        self.reconnects += 1
+
+        for topic in list(self.broadcaster.subscribers):
+            self._local_topic_changed(topic, True)
+
+        try:
+            async for line in reader:
+                message = json.loads(line)
+
+                if "event" in message:
+                    self._dispatch(message["event"])
+                else:
+                    self.broadcaster.publish(topic_key(*message["topic"]), message["message"])
+        finally:
+            self.upstream = None
+            writer.close()
+
+    def stats(self):
+        return {
+            "role": self.role,
+            "pid": os.getpid(),
+            "peers": len(self.peers),
+            "upstream_connected": self.upstream is not None,
+            "elections": self.elections,
+            "reconnects": self.reconnects
+        }
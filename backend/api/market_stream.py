@@ -0,0 +1,317 @@
+"""
+Topic-based fan-out of live mandi prices over /ws/market.
+
+Clients subscribe to (commodity, market) topics by sending JSON:
+    {"action": "subscribe", "commodity": "Onion", "market": "Agra"}
+    {"action": "unsubscribe", "commodity": "Wheat", "market": "Delhi"}
+Anything else (e.g. the frontend's "ping") is ignored. New connections
+start on DEFAULT_TOPIC.
+
+Each message carries only the fields that changed since the previous tick,
+plus commodity/market so clients can route it. A new subscriber first
+gets the full snapshot of the topic.
+
+Every client has its own writer task, so one slow socket never delays the
+others. Pending output is bounded per client: a newer tick for a topic is
+merged into the unsent one (stale ticks are dropped, nothing is lost), and
+if too many topics back up the oldest is evicted and re-sent later as a
+full snapshot.
+"""
+
+import asyncio
+import json
+from collections import OrderedDict
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+DEFAULT_TOPIC = ("Wheat", "Delhi")
+
+# Pending topics per client before the oldest is evicted
+MAX_PENDING = 8
+
+POLL_INTERVAL = 10
+
+
+def topic_key(commodity, market):
+    return str(commodity).strip(), str(market).strip()
+
+
+class ClientChannel:
+
+    def __init__(self, websocket, max_pending=MAX_PENDING):
+
+        self.websocket = websocket
+        self.max_pending = max_pending
+        self.topics = set()
+
+        self.pending = OrderedDict()  # topic -> merged delta
+        self.resync = set()
+        self.ready = asyncio.Event()
+        self.writer = None
+
+        self.sent = 0
+        self.coalesced = 0
+        self.evicted = 0
+
+    def offer(self, topic, delta):
+        """
+        Queues a delta without ever blocking the broadcaster.
+        """
+
+        if topic in self.pending:
+            self.pending[topic].update(delta)
+            self.coalesced += 1
+        else:
+            if len(self.pending) >= self.max_pending:
+                evicted, _ = self.pending.popitem(last=False)
+                self.resync.add(evicted)
+                self.evicted += 1
+            self.pending[topic] = dict(delta)
+
+        self.ready.set()
+
+    def discard(self, topic):
+        """
+        Drops anything queued for topic.
+        """
+
+        self.pending.pop(topic, None)
+        self.resync.discard(topic)
+
+        if not self.pending and not self.resync:
+            self.ready.clear()
+
+    def take(self):
+        """
+        Next (topic, delta) to send, or None when nothing is queued.
+        Evicted topics come last, with a None delta meaning "send the full
+        snapshot".
+        """
+
+        if self.pending:
+            topic, message = self.pending.popitem(last=False)
+            self.resync.discard(topic)
+        elif self.resync:
+            topic, message = self.resync.pop(), None
+        else:
+            self.ready.clear()
+            return None
+
+        if not self.pending and not self.resync:
+            self.ready.clear()
+
+        return topic, message
+
+
+class MarketBroadcaster:
+    """
+    fetch_latest(commodity, market) is a blocking function returning the
+    current message for a topic (or None); it is always run off the event
+    loop.
+
+    topic_listener, if set, is called with (topic, True) when a topic gets
+    its first local subscriber and (topic, False) when it loses its last.
+    """
+
+    def __init__(self, fetch_latest, interval=POLL_INTERVAL, max_pending=MAX_PENDING):
+
+        self.fetch_latest = fetch_latest
+        self.interval = interval
+        self.max_pending = max_pending
+
+        self.channels = {}
+        self.subscribers = {}  # topic -> set of channels
+        self.snapshots = {}  # topic -> last full message
+
+        self.topic_listener = None
+
+        self.ticks = 0
+        self.disconnects = 0
+
+    # Connections
+
+    def register(self, websocket):
+
+        channel = ClientChannel(websocket, self.max_pending)
+        channel.writer = asyncio.create_task(self._write(channel))
+        self.channels[websocket] = channel
+
+        return channel
+
+    def unregister(self, channel):
+
+        if self.channels.pop(channel.websocket, None) is None:
+            return
+
+        for topic in channel.topics:
+            self._remove_subscriber(topic, channel)
+
+        if channel.writer is not None and channel.writer is not asyncio.current_task():
+            channel.writer.cancel()
+
+        self.disconnects += 1
+
+    def subscribe(self, channel, commodity, market):
+
+        topic = topic_key(commodity, market)
+
+        channel.topics.add(topic)
+
+        if topic not in self.subscribers:
+            self.subscribers[topic] = set()
+            if self.topic_listener is not None:
+                self.topic_listener(topic, True)
+
+        self.subscribers[topic].add(channel)
+
+        if topic in self.snapshots:
+            channel.offer(topic, self.snapshots[topic])
+
+        return topic
+
+    def unsubscribe(self, channel, commodity, market):
+
+        topic = topic_key(commodity, market)
+
+        channel.topics.discard(topic)
+        channel.discard(topic)
+
+        self._remove_subscriber(topic, channel)
+
+    def _remove_subscriber(self, topic, channel):
+
+        subscribers = self.subscribers.get(topic)
+
+        if subscribers is None:
+            return
+
+        subscribers.discard(channel)
+
+        if not subscribers:
+            del self.subscribers[topic]
+            if self.topic_listener is not None:
+                self.topic_listener(topic, False)
+
+    async def _write(self, channel):
+
+        try:
+            while True:
+                await channel.ready.wait()
+                queued = channel.take()
+
+                if queued is None:
+                    continue
+
+                topic, message = queued
+
+                if message is None:
+                    message = self.snapshots.get(topic)
+                    if message is None:
+                        continue
+
+                await channel.websocket.send_json(message)
+                channel.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.unregister(channel)
+
+    async def handle(self, websocket: WebSocket):
+        """
+        Serves one /ws/market connection until it closes.
+        """
+
+        await websocket.accept()
+        channel = self.register(websocket)
+        self.subscribe(channel, *DEFAULT_TOPIC)
+
+        try:
+            while True:
+                text = await websocket.receive_text()
+
+                try:
+                    request = json.loads(text)
+                except ValueError:
+                    continue
+
+                if not isinstance(request, dict) or not request.get("commodity") or not request.get("market"):
+                    continue
+
+                if request.get("action") == "subscribe":
+                    self.subscribe(channel, request["commodity"], request["market"])
+                elif request.get("action") == "unsubscribe":
+                    self.unsubscribe(channel, request["commodity"], request["market"])
+        except WebSocketDisconnect:
+            pass
+        finally:
+            self.unregister(channel)
+
+    # Publishing
+
+    def publish(self, topic, message):
+        """
+        Fans the changed fields of message out to the topic's subscribers.
+        Returns the delta (empty when nothing changed).
+        """
+
+        previous = self.snapshots.get(topic, {})
+        delta = {key: value for key, value in message.items() if previous.get(key) != value}
+
+        if not delta:
+            return delta
+
+        self.snapshots[topic] = dict(message)
+        delta["commodity"], delta["market"] = message.get("commodity", topic[0]), message.get("market", topic[1])
+
+        for channel in self.subscribers.get(topic, ()):
+            channel.offer(topic, delta)
+
+        self.ticks += 1
+
+        return delta
+
+    def _fetch_all(self, topics):
+        return {topic: self.fetch_latest(*topic) for topic in topics}
+
+    async def poll_once(self, topics=None):
+        """
+        Fetches and publishes the given topics (default: every topic with a
+        local subscriber). Returns {topic: message} for those that changed.
+        """
+
+        topics = list(self.subscribers if topics is None else topics)
+
+        if not topics:
+            return {}
+
+        messages = await asyncio.to_thread(self._fetch_all, topics)
+
+        return {
+            topic: message
+            for topic, message in messages.items()
+            if message is not None and self.publish(topic, message)
+        }
+
+    async def run(self):
+
+        while True:
+            try:
+                await self.poll_once()
+            except Exception as e:
+                print(f"Market price broadcast error: {e}")
+            await asyncio.sleep(self.interval)
+
+    def stats(self):
+
+        channels = list(self.channels.values())
+
+        return {
+            "clients": len(channels),
+            "topics": len(self.subscribers),
+            "ticks": self.ticks,
+            "sent": sum(c.sent for c in channels),
+            "coalesced": sum(c.coalesced for c in channels),
+            "evicted": sum(c.evicted for c in channels),
+            "pending": sum(len(c.pending) for c in channels),
+            "disconnects": self.disconnects
+        }
@@ -0,0 +1,59 @@
+import asyncio
+
+from backend.api.market_stream import DEFAULT_TOPIC, MarketBroadcaster
+
+
+class FakeWebSocket:
+
+    def __init__(self):
+        self.messages = []
+
+    async def send_json(self, message):
+        self.messages.append(message)
+
+
+def test_unsubscribe_with_a_queued_tick_keeps_the_client():
+
+    async def scenario():
+
+        broadcaster = MarketBroadcaster(fetch_latest=lambda commodity, market: None)
+        websocket = FakeWebSocket()
+
+        channel = broadcaster.register(websocket)
+        broadcaster.subscribe(channel, *DEFAULT_TOPIC)
+        broadcaster.subscribe(channel, "Onion", "Agra")
+
+        # Queued but not yet written when the client unsubscribes
+        broadcaster.publish(DEFAULT_TOPIC, {"price": 100})
+        broadcaster.unsubscribe(channel, *DEFAULT_TOPIC)
+
+        assert not channel.ready.is_set()
+        await asyncio.sleep(0)
+
+        broadcaster.publish(("Onion", "Agra"), {"price": 200})
+        await asyncio.sleep(0)
+
+        assert websocket in broadcaster.channels
+        assert broadcaster.disconnects == 0
+        assert websocket.messages == [{"price": 200, "commodity": "Onion", "market": "Agra"}]
+
+        broadcaster.unregister(channel)
+
+    asyncio.run(scenario())
+
+
+def test_take_on_an_empty_channel_returns_none():
+
+    async def scenario():
+
+        broadcaster = MarketBroadcaster(fetch_latest=lambda commodity, market: None)
+        channel = broadcaster.register(FakeWebSocket())
+
+        # A stray wake-up with nothing queued
+        channel.ready.set()
+        assert channel.take() is None
+        assert not channel.ready.is_set()
+
+        broadcaster.unregister(channel)
+
+    asyncio.run(scenario())
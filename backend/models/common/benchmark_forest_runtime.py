@@ -0,0 +1,131 @@
+"""
+Parity check and latency benchmark of the compiled forest runtime against
+scikit-learn for every forest served by the API. test_forest_runtime.py
+runs the same parity checks on small synthetic forests.
+
+Run from the repository root:
+    python -m backend.models.common.benchmark_forest_runtime
+"""
+
+import glob
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from backend.models.common.forest_runtime import compile_model
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+
+CROP_MODEL_PATH = os.path.join(BASE_DIR, "model_1_crop_yield_estimation", "models", "base_crop_yield_model.pkl")
+CROP_X_TEST_PATH = os.path.join(BASE_DIR, "model_1_crop_yield_estimation", "data", "processed", "train_test_split", "train_test_splitX_test.csv")
+AGRO_MODEL_PATH = os.path.join(BASE_DIR, "model_2_agro_impact", "models", "agro_impact_model.pkl")
+AGRO_X_TEST_PATH = os.path.join(BASE_DIR, "model_2_agro_impact", "data", "processed", "train_test_split", "X_test.csv")
+RISK_MODEL_PATH = os.path.join(BASE_DIR, "model_5_crop_risk_model", "models", "risk_model.pkl")
+LIVESTOCK_MODEL_PATH = os.path.join(BASE_DIR, "model_6_livestock_health_model", "models", "livestock_health_model.pkl")
+MARKET_MODEL_DIR = os.path.join(BASE_DIR, "model_3_market_price", "models")
+
+N_ROWS = 1000
+N_MARKET_MODELS = 5
+REPEATS = 20
+
+
+def sample_inputs(forest, n_rows, seed=42):
+    """
+    Uniform samples between the smallest and largest split threshold of each
+    feature, so both sides of most splits get exercised.
+    """
+    rng = np.random.default_rng(seed)
+    low = np.zeros(forest.n_features_in_)
+    high = np.ones(forest.n_features_in_)
+
+    thresholds = [[] for _ in range(forest.n_features_in_)]
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        split = tree.children_left != -1
+        for feature, threshold in zip(tree.feature[split], tree.threshold[split]):
+            thresholds[feature].append(threshold)
+
+    for feature, values in enumerate(thresholds):
+        if values:
+            low[feature] = min(values) - 1
+            high[feature] = max(values) + 1
+
+    X = rng.uniform(low, high, size=(n_rows, forest.n_features_in_))
+
+    names = getattr(forest, "feature_names_in_", None)
+    if names is not None:
+        return pd.DataFrame(X, columns=names)
+    return X
+
+
+def time_call(fn, X):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        fn(X)
+    return (time.perf_counter() - start) / REPEATS * 1000
+
+
+def check_parity(model, compiled, X):
+
+    if hasattr(model, "predict_proba"):
+        expected = model.predict_proba(X)
+        actual = compiled.predict_proba(X)
+        labels_match = np.array_equal(model.predict(X), compiled.predict(X))
+        return np.allclose(expected, actual) and labels_match
+
+    return np.allclose(model.predict(X), compiled.predict(X))
+
+
+def benchmark(name, path, X=None):
+
+    if not os.path.exists(path):
+        print(f"{name:<32} skipped (missing {path})")
+        return
+
+    model = joblib.load(path)
+
+    if X is None and not hasattr(model, "estimators_"):
+        print(f"{name:<32} skipped (no sample inputs for {type(model).__name__})")
+        return
+
+    start = time.perf_counter()
+    compiled = compile_model(model)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    if X is None:
+        X = sample_inputs(model, N_ROWS)
+
+    single = X.iloc[:1] if hasattr(X, "iloc") else X[:1]
+
+    parity = check_parity(model, compiled, X)
+
+    print(
+        f"{name:<32} parity={'ok' if parity else 'FAIL':<4} "
+        f"compile={compile_ms:8.1f}ms  "
+        f"single sklearn={time_call(model.predict, single):7.2f}ms "
+        f"compiled={time_call(compiled.predict, single):7.2f}ms  "
+        f"batch[{len(X)}] sklearn={time_call(model.predict, X):8.2f}ms "
+        f"compiled={time_call(compiled.predict, X):8.2f}ms"
+    )
+
+
+def main():
+
+    crop_X = pd.read_csv(CROP_X_TEST_PATH).head(N_ROWS) if os.path.exists(CROP_X_TEST_PATH) else None
+    agro_X = pd.read_csv(AGRO_X_TEST_PATH).head(N_ROWS) if os.path.exists(AGRO_X_TEST_PATH) else None
+
+    benchmark("crop_yield_pipeline", CROP_MODEL_PATH, crop_X)
+    benchmark("agro_impact", AGRO_MODEL_PATH, agro_X)
+    benchmark("crop_risk", RISK_MODEL_PATH)
+    benchmark("livestock_health", LIVESTOCK_MODEL_PATH)
+
+    market_paths = sorted(glob.glob(os.path.join(MARKET_MODEL_DIR, "*.pkl")))
+    for path in market_paths[:N_MARKET_MODELS]:
+        benchmark(os.path.splitext(os.path.basename(path))[0], path)
+
+
+if __name__ == "__main__":
+    main()
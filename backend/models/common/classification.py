@@ -0,0 +1,36 @@
+import numpy as np
+
+
+class ClassificationService:
+    """
+    Label, confidence and full class distribution from a single
+    predict_proba pass, for one row or a whole batch.
+    """
+
+    def __init__(self, model, label_encoder=None):
+
+        self.model = model
+        self.label_encoder = label_encoder
+
+        class_names = model.classes_
+        if label_encoder is not None:
+            class_names = label_encoder.inverse_transform(class_names)
+
+        self.class_names = [str(name) for name in class_names]
+
+    def classify(self, X):
+
+        probabilities = self.model.predict_proba(X)
+        best = np.argmax(probabilities, axis=1)
+
+        return [
+            {
+                "label": self.class_names[index],
+                "confidence": float(row[index]),
+                "probabilities": dict(zip(self.class_names, row.tolist()))
+            }
+            for index, row in zip(best, probabilities)
+        ]
+
+    def classify_one(self, x):
+        return self.classify(np.asarray(x, dtype=float).reshape(1, -1))[0]
@@ -0,0 +1,291 @@
+import joblib
+import numpy as np
+from sklearn.pipeline import Pipeline
+
+
+# Rows evaluated per traversal block, scaled by tree count so that the
+# (rows x trees) node index matrix stays around a million entries.
+BLOCK_CELLS = 1 << 20
+
+
+def _walk(forest, X, node):
+    """
+    Advances every (row, tree) cell of node, laid out row-major with
+    len(node) // len(X) trees per row, from its root to a leaf.
+    """
+
+    n_samples, n_features = X.shape
+    flat_X = X.ravel()
+
+    row_offset = np.repeat(
+        np.arange(n_samples, dtype=np.int64) * n_features,
+        len(node) // max(n_samples, 1)
+    )
+
+    # Only (row, tree) cells still sitting on a split node are advanced.
+    active = np.flatnonzero(~forest.is_leaf[node])
+
+    while active.size:
+        current = node[active]
+        go_left = flat_X[row_offset[active] + forest.feature[current]] <= forest.threshold[current]
+        current = np.where(go_left, forest.children_left[current], forest.children_right[current])
+        node[active] = current
+        active = active[~forest.is_leaf[current]]
+
+    return node
+
+
+class CompiledForest:
+    """
+    A fitted RandomForestRegressor / RandomForestClassifier flattened into
+    contiguous node tables. All trees share one set of arrays; leaves point
+    back to themselves so every (row, tree) pair can be walked in lockstep.
+    """
+
+    def __init__(self,
+                 feature,
+                 threshold,
+                 children_left,
+                 children_right,
+                 value,
+                 roots,
+                 max_depth,
+                 n_features_in_,
+                 classes_=None,
+                 feature_names_in_=None,
+                 is_leaf=None):
+
+        self.feature = feature
+        self.threshold = threshold
+        self.children_left = children_left
+        self.children_right = children_right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features_in_ = int(n_features_in_)
+        self.classes_ = classes_
+        self.feature_names_in_ = feature_names_in_
+        if is_leaf is None:
+            is_leaf = children_left == np.arange(len(children_left))
+        self.is_leaf = is_leaf
+
+    @classmethod
+    def from_sklearn(cls, forest):
+
+        is_classifier = hasattr(forest, "classes_")
+
+        features = []
+        thresholds = []
+        lefts = []
+        rights = []
+        values = []
+        roots = []
+
+        offset = 0
+
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count)
+            leaf = tree.children_left == -1
+
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(np.where(leaf, np.inf, tree.threshold))
+            lefts.append(np.where(leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(leaf, node_ids, tree.children_right) + offset)
+
+            if is_classifier:
+                node_value = tree.value[:, 0, :]
+                totals = node_value.sum(axis=1, keepdims=True)
+                totals[totals == 0] = 1.0
+                values.append(node_value / totals)
+            else:
+                values.append(tree.value[:, 0, 0])
+
+            roots.append(offset)
+            offset += tree.node_count
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.int32),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            children_left=np.ascontiguousarray(np.concatenate(lefts), dtype=np.int32),
+            children_right=np.ascontiguousarray(np.concatenate(rights), dtype=np.int32),
+            value=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max(e.tree_.max_depth for e in forest.estimators_),
+            n_features_in_=forest.n_features_in_,
+            classes_=forest.classes_ if is_classifier else None,
+            feature_names_in_=getattr(forest, "feature_names_in_", None)
+        )
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def nbytes(self):
+        return sum(
+            array.nbytes
+            for array in (self.feature, self.threshold, self.children_left,
+                          self.children_right, self.value, self.roots, self.is_leaf)
+        )
+
+    @property
+    def is_classifier(self):
+        return self.classes_ is not None
+
+    def _as_matrix(self, X):
+
+        if hasattr(X, "toarray"):
+            X = X.toarray()
+        elif self.feature_names_in_ is not None and hasattr(X, "columns"):
+            X = X[list(self.feature_names_in_)]
+
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+
+        if X.ndim == 1:
+            X = X.reshape(1, -1) if X.size else X.reshape(0, self.n_features_in_)
+
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X has {X.shape[1]} features, but the model expects {self.n_features_in_}"
+            )
+
+        return X
+
+    def _apply_block(self, X):
+        node = _walk(self, X, np.tile(self.roots, X.shape[0]))
+        return node.reshape(X.shape[0], self.n_trees)
+
+    def _blocks(self, X):
+        # An empty X is still one (empty) block, so results keep their
+        # trailing shape instead of concatenating nothing
+        block_rows = max(1, BLOCK_CELLS // max(self.n_trees, 1))
+        for start in range(0, max(X.shape[0], 1), block_rows):
+            yield X[start:start + block_rows]
+
+    def apply(self, X):
+        """
+        Global leaf index reached in every tree, shape (n_samples, n_trees).
+        """
+        X = self._as_matrix(X)
+        return np.concatenate([self._apply_block(block) for block in self._blocks(X)])
+
+    def tree_predictions(self, X):
+        """
+        Per-tree outputs: (n_samples, n_trees) for regressors and
+        (n_samples, n_trees, n_classes) for classifiers.
+        """
+        return self.value[self.apply(X)]
+
+    def predict_proba(self, X):
+
+        if not self.is_classifier:
+            raise AttributeError("predict_proba is only available for classifiers")
+
+        X = self._as_matrix(X)
+
+        return np.concatenate([
+            self.value[self._apply_block(block)].mean(axis=1)
+            for block in self._blocks(X)
+        ])
+
+    def predict(self, X):
+
+        if self.is_classifier:
+            return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+        X = self._as_matrix(X)
+
+        return np.concatenate([
+            self.value[self._apply_block(block)].mean(axis=1)
+            for block in self._blocks(X)
+        ])
+
+
+class ForestBundle:
+    """
+    Several compiled regressors with the same tree count and features
+    stacked into one node table, so rows meant for different forests are
+    evaluated in a single traversal; forest_ids picks each row's forest.
+    """
+
+    def __init__(self, forests):
+
+        forests = list(forests)
+        n_trees = {forest.n_trees for forest in forests}
+        n_features = {forest.n_features_in_ for forest in forests}
+
+        if len(n_trees) != 1 or len(n_features) != 1:
+            raise ValueError("Bundled forests must share tree count and feature count")
+        if any(forest.is_classifier for forest in forests):
+            raise ValueError("Only regressors can be bundled")
+
+        offsets = np.cumsum([0] + [len(forest.feature) for forest in forests])[:-1]
+
+        self.n_trees = n_trees.pop()
+        self.n_features_in_ = n_features.pop()
+        self.feature = np.concatenate([forest.feature for forest in forests])
+        self.threshold = np.concatenate([forest.threshold for forest in forests])
+        self.children_left = np.concatenate([forest.children_left + offset for forest, offset in zip(forests, offsets)]).astype(np.int32)
+        self.children_right = np.concatenate([forest.children_right + offset for forest, offset in zip(forests, offsets)]).astype(np.int32)
+        self.value = np.concatenate([forest.value for forest in forests])
+        self.is_leaf = np.concatenate([forest.is_leaf for forest in forests])
+        self.roots = np.stack([forest.roots + offset for forest, offset in zip(forests, offsets)]).astype(np.int32)
+
+    def __len__(self):
+        return len(self.roots)
+
+    def tree_predictions(self, X, forest_ids):
+        """
+        Per-tree outputs of each row's forest, shape (n_samples, n_trees).
+        """
+
+        # Same float32 comparison as CompiledForest, so results match exactly
+        X = np.asarray(X, dtype=np.float32)
+        node = _walk(self, X, self.roots[forest_ids].ravel())
+
+        return self.value[node].reshape(X.shape[0], self.n_trees)
+
+    def predict(self, X, forest_ids):
+        return self.tree_predictions(X, forest_ids).mean(axis=1)
+
+
+class CompiledPipeline:
+    """
+    sklearn Pipeline whose final forest step has been compiled. The
+    preprocessing steps are kept as-is and named_steps still resolves
+    every step by name.
+    """
+
+    def __init__(self, pipeline):
+
+        *transform_steps, (final_name, final_step) = pipeline.steps
+
+        self.transform_steps = transform_steps
+        self.final_step = CompiledForest.from_sklearn(final_step)
+        self.named_steps = dict(transform_steps)
+        self.named_steps[final_name] = self.final_step
+
+    def transform(self, X):
+        for _, step in self.transform_steps:
+            X = step.transform(X)
+        return X
+
+    def predict(self, X):
+        return self.final_step.predict(self.transform(X))
+
+    def predict_proba(self, X):
+        return self.final_step.predict_proba(self.transform(X))
+
+
+def compile_model(model):
+
+    if isinstance(model, Pipeline):
+        return CompiledPipeline(model)
+
+    return CompiledForest.from_sklearn(model)
+
+
+def load_compiled(path):
+    return compile_model(joblib.load(path))
@@ -0,0 +1,108 @@
+import numpy as np
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder
+
+
+class PipelineRowEncoder:
+    """
+    Turns a request dict into the feature vector a fitted ColumnTransformer
+    would produce, without building a DataFrame. Supports one-hot encoded
+    and passthrough columns (including the remainder); dropped columns are
+    ignored. One-hot encoders that group infrequent categories are
+    rejected rather than encoded differently.
+    """
+
+    def __init__(self, column_transformer):
+
+        self.one_hot = []      # (column, {category: output index}, handle_unknown)
+        self.passthrough = []  # (column, output index)
+
+        offset = 0
+        names = getattr(column_transformer, "feature_names_in_", None)
+
+        for name, transformer, columns in column_transformer.transformers_:
+
+            if transformer == "drop":
+                continue
+
+            # Columns may be selected by position; records are keyed by name
+            if names is not None:
+                columns = [names[column] if isinstance(column, (int, np.integer)) else column for column in columns]
+
+            # newer sklearn stores fitted passthrough columns as an identity FunctionTransformer
+            if transformer == "passthrough" or (
+                isinstance(transformer, FunctionTransformer) and transformer.func is None
+            ):
+                for column in columns:
+                    self.passthrough.append((column, offset))
+                    offset += 1
+                continue
+
+            if not isinstance(transformer, OneHotEncoder) or transformer.drop is not None:
+                raise ValueError(f"Unsupported transformer for row encoding: {name}")
+
+            if getattr(transformer, "min_frequency", None) is not None or getattr(transformer, "max_categories", None) is not None:
+                raise ValueError(f"One-hot encoder {name} groups infrequent categories, which row encoding doesn't support")
+
+            for column, categories in zip(columns, transformer.categories_):
+                lookup = {
+                    category: offset + i
+                    for i, category in enumerate(categories.tolist())
+                }
+                self.one_hot.append((column, lookup, transformer.handle_unknown))
+                offset += len(categories)
+
+        self.n_features = offset
+
+    def encode(self, record):
+
+        row = np.zeros(self.n_features)
+
+        for column, lookup, handle_unknown in self.one_hot:
+            index = lookup.get(record[column])
+            if index is not None:
+                row[index] = 1.0
+            elif handle_unknown == "error":
+                raise ValueError(f"Found unknown category {record[column]!r} in column {column}")
+
+        for column, index in self.passthrough:
+            row[index] = record[column]
+
+        return row
+
+    def encode_many(self, records):
+        return np.vstack([self.encode(record) for record in records])
+
+
+class LabelRowEncoder:
+    """
+    Orders a request dict by the model's training columns and maps the
+    LabelEncoder-encoded ones through precomputed class lookups.
+    """
+
+    def __init__(self, feature_names, label_encoders):
+
+        self.feature_names = list(feature_names)
+        self.lookups = {
+            column: {label: i for i, label in enumerate(encoder.classes_.tolist())}
+            for column, encoder in label_encoders.items()
+        }
+
+    def encode(self, record):
+
+        row = np.empty(len(self.feature_names))
+
+        for i, column in enumerate(self.feature_names):
+            value = record[column]
+            lookup = self.lookups.get(column)
+
+            if lookup is not None:
+                if value not in lookup:
+                    raise ValueError(f"y contains previously unseen labels: {value!r}")
+                value = lookup[value]
+
+            row[i] = value
+
+        return row
+
+    def encode_many(self, records):
+        return np.vstack([self.encode(record) for record in records])
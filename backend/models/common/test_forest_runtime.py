@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from backend.models.common.benchmark_forest_runtime import check_parity, sample_inputs
+from backend.models.common.forest_runtime import ForestBundle, compile_model
+
+N_FEATURES = 6
+
+
+def training_data(seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(300, N_FEATURES))
+    return X, X[:, 0] * 3 + X[:, 1] ** 2 + rng.normal(scale=0.1, size=len(X))
+
+
+def regressor(seed=0):
+    X, y = training_data(seed)
+    return RandomForestRegressor(n_estimators=20, max_depth=8, random_state=seed).fit(X, y)
+
+
+def classifier():
+    X, y = training_data()
+    return RandomForestClassifier(n_estimators=20, max_depth=8, random_state=0).fit(X, np.digitize(y, [-1, 1, 4]))
+
+
+@pytest.mark.parametrize("make_model", [regressor, classifier], ids=["regressor", "classifier"])
+def test_matches_sklearn(make_model):
+
+    model = make_model()
+    X = sample_inputs(model, 500)
+
+    assert check_parity(model, compile_model(model), X)
+
+
+def test_matches_sklearn_on_named_features():
+
+    X, y = training_data()
+    frame = pd.DataFrame(X, columns=[f"f{i}" for i in range(N_FEATURES)])
+    model = RandomForestRegressor(n_estimators=20, max_depth=8, random_state=0).fit(frame, y)
+
+    # Columns out of order are picked by name, as sklearn does
+    X = sample_inputs(model, 200)
+    X = X[list(reversed(X.columns))]
+
+    assert np.allclose(model.predict(X[model.feature_names_in_]), compile_model(model).predict(X))
+
+
+def test_pipeline_matches_sklearn():
+
+    X, y = training_data()
+    pipeline = Pipeline([
+        ("scale", StandardScaler()),
+        ("forest", RandomForestRegressor(n_estimators=20, max_depth=8, random_state=0))
+    ]).fit(X, y)
+
+    assert check_parity(pipeline, compile_model(pipeline), X[:200])
+
+
+def test_tree_predictions_match_sklearn_trees():
+
+    model = regressor()
+    X = sample_inputs(model, 100)
+
+    expected = np.stack([tree.predict(X) for tree in model.estimators_], axis=1)
+
+    assert np.allclose(compile_model(model).tree_predictions(X), expected)
+
+
+def test_bundle_matches_each_forest():
+
+    forests = [compile_model(regressor(seed)) for seed in range(3)]
+    bundle = ForestBundle(forests)
+
+    X = np.random.default_rng(1).normal(size=(90, N_FEATURES))
+    forest_ids = np.arange(len(X)) % len(forests)
+
+    expected = np.array([forests[i].predict(row)[0] for i, row in zip(forest_ids, X)])
+
+    assert np.allclose(bundle.predict(X, forest_ids), expected)
+
+
+def test_empty_input():
+
+    compiled = compile_model(regressor())
+    empty = np.empty((0, N_FEATURES))
+
+    assert compiled.apply(empty).shape == (0, compiled.n_trees)
+    assert compiled.tree_predictions(empty).shape == (0, compiled.n_trees)
+    assert compiled.predict(empty).shape == (0,)
+    assert compiled.predict([]).shape == (0,)
+
+    compiled = compile_model(classifier())
+
+    assert compiled.predict_proba(empty).shape == (0, len(compiled.classes_))
+    assert compiled.predict(empty).shape == (0,)
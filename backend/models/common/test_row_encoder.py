@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import LabelEncoder, OneHotEncoder
+
+from backend.models.common.row_encoder import LabelRowEncoder, PipelineRowEncoder
+
+TRAIN = pd.DataFrame({
+    "crop": ["Rice", "Wheat", "Maize", "Rice", "Wheat"],
+    "soil": ["clay", "loam", "sandy", "loam", "clay"],
+    "rainfall": [1200.0, 450.0, 800.0, 1100.0, 500.0],
+    "area": [2.0, 5.5, 1.0, 3.0, 4.0],
+    "season": [1, 2, 1, 1, 2]
+})
+
+RECORDS = [
+    {"crop": "Wheat", "soil": "sandy", "rainfall": 300.0, "area": 1.5, "season": 2},
+    # Unknown categories in both one-hot columns
+    {"crop": "Millet", "soil": "peat", "rainfall": 900.0, "area": 2.5, "season": 3}
+]
+
+
+def fitted(remainder="passthrough", **encoder_options):
+    transformer = ColumnTransformer(
+        [("categorical", OneHotEncoder(handle_unknown="ignore", **encoder_options), ["crop", "soil"])],
+        remainder=remainder
+    )
+    return transformer.fit(TRAIN)
+
+
+def expected(transformer, records):
+    output = transformer.transform(pd.DataFrame(records, columns=TRAIN.columns))
+    return output.toarray() if hasattr(output, "toarray") else np.asarray(output)
+
+
+@pytest.mark.parametrize("remainder", ["passthrough", "drop"])
+def test_matches_column_transformer(remainder):
+
+    transformer = fitted(remainder)
+    encoder = PipelineRowEncoder(transformer)
+
+    assert np.array_equal(encoder.encode_many(RECORDS), expected(transformer, RECORDS))
+    assert np.array_equal(encoder.encode(RECORDS[1]), expected(transformer, RECORDS[1:])[0])
+
+
+def test_explicit_passthrough_columns():
+
+    transformer = ColumnTransformer([
+        ("categorical", OneHotEncoder(handle_unknown="ignore"), ["season", "crop"]),
+        ("numeric", "passthrough", ["area", "rainfall"])
+    ]).fit(TRAIN)
+
+    assert np.array_equal(PipelineRowEncoder(transformer).encode_many(RECORDS), expected(transformer, RECORDS))
+
+
+def test_unknown_category_raises_when_the_encoder_does():
+
+    transformer = ColumnTransformer(
+        [("categorical", OneHotEncoder(handle_unknown="error"), ["crop", "soil"])],
+        remainder="passthrough"
+    ).fit(TRAIN)
+    encoder = PipelineRowEncoder(transformer)
+
+    assert np.array_equal(encoder.encode(RECORDS[0]), expected(transformer, RECORDS[:1])[0])
+    with pytest.raises(ValueError):
+        encoder.encode(RECORDS[1])
+
+
+@pytest.mark.parametrize("options", [{"min_frequency": 2}, {"max_categories": 2}])
+def test_rejects_infrequent_category_grouping(options):
+
+    with pytest.raises(ValueError, match="infrequent"):
+        PipelineRowEncoder(fitted(**options))
+
+
+def test_label_encoder_matches():
+
+    encoders = {column: LabelEncoder().fit(TRAIN[column]) for column in ("crop", "soil")}
+    columns = ["crop", "soil", "rainfall"]
+    encoder = LabelRowEncoder(columns, encoders)
+
+    record = RECORDS[0]
+    expected_row = [encoders["crop"].transform([record["crop"]])[0],
+                    encoders["soil"].transform([record["soil"]])[0],
+                    record["rainfall"]]
+
+    assert np.array_equal(encoder.encode(record), expected_row)
+    with pytest.raises(ValueError):
+        encoder.encode(RECORDS[1])
@@ -1,12 +1,73 @@
+import weakref
+
 import numpy as np
 
-def confidence_score(rf_model, X_processed):
-    all_preds = np.array([tree.predict(X_processed) for tree in rf_model.estimators_])  # (n_trees, n_samples)
-    means = all_preds.mean(axis=0)
-    stds = all_preds.std(axis=0)
+# Dense (n_trees, max_nodes) table of node values per fitted sklearn forest,
+# built on first use so later calls only need the leaf indices from apply().
+_LEAF_VALUE_TABLES = weakref.WeakKeyDictionary()
+
+
+def _leaf_value_table(rf_model):
+
+    table = _LEAF_VALUE_TABLES.get(rf_model)
+
+    if table is None:
+        trees = [estimator.tree_ for estimator in rf_model.estimators_]
+        table = np.zeros((len(trees), max(tree.node_count for tree in trees)))
+
+        for i, tree in enumerate(trees):
+            table[i, :tree.node_count] = tree.value[:, 0, 0]
+
+        _LEAF_VALUE_TABLES[rf_model] = table
+
+    return table
+
+
+def tree_outputs(rf_model, X_processed):
+    """
+    Per-tree predictions of shape (n_samples, n_trees) from a single
+    traversal of the forest.
+    """
+
+    if hasattr(rf_model, "tree_predictions"):
+        return rf_model.tree_predictions(X_processed)
+
+    leaves = rf_model.apply(X_processed)  # (n_samples, n_trees)
+    table = _leaf_value_table(rf_model)
+
+    return table[np.arange(table.shape[0]), leaves]
+
+
+def prediction_statistics(rf_model, X_processed, quantiles=None):
+    """
+    Mean, std and (optionally) quantiles of the tree predictions.
+    quantiles is a sequence of floats in [0, 1]; each one is returned
+    under its own key in "quantiles".
+    """
+
+    all_preds = tree_outputs(rf_model, X_processed)
+
+    stats = {
+        "mean": all_preds.mean(axis=1),
+        "std": all_preds.std(axis=1)
+    }
+
+    if quantiles:
+        values = np.quantile(all_preds, quantiles, axis=1)
+        stats["quantiles"] = dict(zip(quantiles, values))
+
+    return stats
+
+
+def score_from_statistics(means, stds):
     scores = 1 - stds / (means + 1e-8)
     return np.clip(scores, 0, 1)
 
+
+def confidence_score(rf_model, X_processed):
+    stats = prediction_statistics(rf_model, X_processed)
+    return score_from_statistics(stats["mean"], stats["std"])
+
 if __name__ == "__main__":
     from sklearn.ensemble import RandomForestRegressor
     import numpy as np
@@ -20,4 +81,8 @@ if __name__ == "__main__":
     print(f"Confidence score (single sample): {single_score:.4f}")
 
     batch_scores = confidence_score(model, X)
-    print(f"Confidence scores (batch): {batch_scores}")
\ No newline at end of file
+    print(f"Confidence scores (batch): {batch_scores}")
+
+    stats = prediction_statistics(model, X, quantiles=[0.1, 0.9])
+    print(f"10%-90% interval (single sample): "
+          f"{stats['quantiles'][0.1][0]:.4f} - {stats['quantiles'][0.9][0]:.4f}")
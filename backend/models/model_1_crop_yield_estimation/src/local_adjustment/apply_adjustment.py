@@ -1,3 +1,5 @@
+import numpy as np
+
 from .soil_factor import get_soil_factor
 from .weather_factor import weather_factor
 
@@ -8,3 +10,15 @@ def apply_adjustment(base_yield, soil_type, rainfall_deviation):
         weather_factor(rainfall_deviation),
         2
     )
+
+def apply_adjustment_batch(base_yields, soil_types, rainfall_deviations):
+    soil_factors = np.fromiter(
+        (get_soil_factor(soil_type) for soil_type in soil_types),
+        dtype=float
+    )
+    weather_factors = weather_factor(np.asarray(rainfall_deviations, dtype=float))
+
+    return np.round(
+        np.asarray(base_yields, dtype=float) * soil_factors * weather_factors,
+        2
+    )
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+from backend.models.common.forest_runtime import compile_model
+from backend.models.model_1_crop_yield_estimation.src.confidence.confidence_score import (
+    confidence_score,
+    prediction_statistics,
+    tree_outputs
+)
+from backend.models.model_1_crop_yield_estimation.src.local_adjustment.apply_adjustment import (
+    apply_adjustment,
+    apply_adjustment_batch
+)
+
+QUANTILES = (0.1, 0.5, 0.9)
+
+
+def fitted_pipeline():
+
+    rng = np.random.default_rng(0)
+    n = 200
+    X = pd.DataFrame({
+        "crop": rng.choice(["Rice", "Wheat", "Maize"], n),
+        "rainfall": rng.uniform(300, 1500, n),
+        "area": rng.uniform(0.5, 10, n)
+    })
+    y = np.log1p(X["rainfall"] / 100 + X["area"] + (X["crop"] == "Rice") * 3 + rng.normal(0, 0.5, n))
+
+    pipeline = Pipeline([
+        ("preprocessor", ColumnTransformer(
+            [("crop", OneHotEncoder(handle_unknown="ignore"), ["crop"])],
+            remainder="passthrough"
+        )),
+        ("regressor", RandomForestRegressor(n_estimators=25, max_depth=6, random_state=0))
+    ])
+
+    return pipeline.fit(X, y), X.head(40)
+
+
+def per_tree_loop(forest, X):
+    """
+    The baseline: every tree predicts separately, shape (n_trees, n_samples).
+    """
+    return np.array([tree.predict(X) for tree in forest.estimators_])
+
+
+@pytest.mark.parametrize("compiled", [False, True], ids=["sklearn", "compiled"])
+def test_statistics_match_per_tree_loop(compiled):
+
+    pipeline, X = fitted_pipeline()
+    forest = pipeline.named_steps["regressor"]
+    processed = pipeline.named_steps["preprocessor"].transform(X)
+
+    expected = per_tree_loop(forest, processed)
+    model = compile_model(forest) if compiled else forest
+
+    assert np.allclose(tree_outputs(model, processed), expected.T)
+
+    stats = prediction_statistics(model, processed, quantiles=QUANTILES)
+
+    assert np.allclose(stats["mean"], expected.mean(axis=0))
+    assert np.allclose(stats["mean"], forest.predict(processed))
+    assert np.allclose(stats["std"], expected.std(axis=0))
+    for q in QUANTILES:
+        assert np.allclose(stats["quantiles"][q], np.quantile(expected, q, axis=0))
+
+    scores = np.clip(1 - expected.std(axis=0) / (expected.mean(axis=0) + 1e-8), 0, 1)
+    assert np.allclose(confidence_score(model, processed), scores)
+
+
+def test_adjustment_batch_matches_scalar():
+
+    pipeline, X = fitted_pipeline()
+    base_yields = np.expm1(pipeline.predict(X))
+
+    soil_types = np.resize(["sandy", "Loam", "clay_loam", "clay", "peat"], len(X))
+    rainfall_deviations = np.linspace(-0.4, 0.4, len(X))
+
+    expected = [
+        apply_adjustment(base_yield, soil_type, deviation)
+        for base_yield, soil_type, deviation in zip(base_yields, soil_types, rainfall_deviations)
+    ]
+
+    assert np.allclose(apply_adjustment_batch(base_yields, soil_types, rainfall_deviations), expected, rtol=0, atol=1e-9)
@@ -1,7 +1,10 @@
 import joblib
-import pandas as pd
 import os
 
+from backend.models.common.classification import ClassificationService
+from backend.models.common.forest_runtime import load_compiled
+from backend.models.common.row_encoder import LabelRowEncoder
+
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 
 MODEL_PATH = os.path.join(BASE_DIR, "models", "agro_impact_model.pkl")
@@ -10,30 +13,49 @@ SOIL_ENCODER_PATH = os.path.join(BASE_DIR, "models", "soil_encoder.pkl")
 WATER_ENCODER_PATH = os.path.join(BASE_DIR, "models", "water_encoder.pkl")
 STAGE_ENCODER_PATH = os.path.join(BASE_DIR, "models", "stage_encoder.pkl")
 
-model = joblib.load(MODEL_PATH)
+model = load_compiled(MODEL_PATH)
 target_encoder = joblib.load(TARGET_ENCODER_PATH)
 soil_encoder = joblib.load(SOIL_ENCODER_PATH)
 water_encoder = joblib.load(WATER_ENCODER_PATH)
 stage_encoder = joblib.load(STAGE_ENCODER_PATH)
 
+row_encoder = LabelRowEncoder(
+    model.feature_names_in_,
+    {
+        "soil_type": soil_encoder,
+        "water_source_type": water_encoder,
+        "growth_stage": stage_encoder
+    }
+)
+
+classifier = ClassificationService(model, target_encoder)
+
+
+def _impact_result(prediction):
+    return {
+        "impact": prediction["label"],
+        "confidence": round(prediction["confidence"], 2),
+        "probabilities": {
+            label: round(probability, 4)
+            for label, probability in prediction["probabilities"].items()
+        }
+    }
+
 def predict_agro_impact(input_data: dict):
     """
     input_data must contain all feature columns except 'label' and 'impact'
     """
 
-    df = pd.DataFrame([input_data])
+    X = row_encoder.encode(input_data).reshape(1, -1)
 
-    df["soil_type"] = soil_encoder.transform(df["soil_type"])
-    df["water_source_type"] = water_encoder.transform(df["water_source_type"])
-    df["growth_stage"] = stage_encoder.transform(df["growth_stage"])
+    return _impact_result(classifier.classify(X)[0])
 
-    pred_class = model.predict(df)[0]
-    probabilities = model.predict_proba(df)[0]
-    confidence = max(probabilities)
 
-    impact_label = target_encoder.inverse_transform([pred_class])[0]
+def predict_agro_impact_batch(records):
+    """
+    Scores many feature dicts with one forest pass over the whole batch.
+    """
 
-    return {
-        "impact": impact_label,
-        "confidence": round(float(confidence), 2)
-    }
\ No newline at end of file
+    X = row_encoder.encode_many(records)
+
+    return [_impact_result(prediction) for prediction in classifier.classify(X)]
@@ -1,3 +1,175 @@
+import requests
+import pandas as pd
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+load_dotenv()
+
+# data.gov.in caps a single page; larger requests are silently truncated
+PAGE_SIZE = int(os.getenv("AGMARKNET_PAGE_SIZE", "1000"))
+MAX_WORKERS = int(os.getenv("AGMARKNET_WORKERS", "8"))
+REQUEST_TIMEOUT = 10
+
+# arrival_date comes back as dd/mm/yyyy
+API_DATE_FORMAT = "%d/%m/%Y"
+
+COLUMNS = ["Commodity", "Market", "State", "Modal_Price", "Price_Date"]
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    One pooled session (with retries) shared by every call and worker thread.
+    """
+
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                retries = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET"])
+                adapter = HTTPAdapter(max_retries=retries, pool_connections=4, pool_maxsize=MAX_WORKERS * 2)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+
+    return _session
+
+
+def fetch_page(url, params, offset, limit=PAGE_SIZE):
+
+    page_params = dict(params, offset=offset, limit=limit)
+
+    response = get_session().get(url, params=page_params, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+
+    return response.json()
+
+
+def fetch_all_records(url, params, page_size=PAGE_SIZE, workers=MAX_WORKERS, max_records=None):
+    """
+    Reads the first page to learn the total record count, then fetches the
+    remaining pages concurrently. Records are returned in API order.
+    """
+
+    first = fetch_page(url, params, 0, page_size)
+    records = list(first.get("records", []))
+
+    total = int(first.get("total", len(records)) or 0)
+    if max_records is not None:
+        total = min(total, max_records)
+
+    offsets = list(range(page_size, total, page_size))
+
+    if offsets:
+        with ThreadPoolExecutor(max_workers=min(workers, len(offsets))) as pool:
+            pages = pool.map(lambda offset: fetch_page(url, params, offset, page_size), offsets)
+            for page in pages:
+                records.extend(page.get("records", []))
+
+    return records[:total] if max_records is not None else records
+
+
+def parse_date(value):
+    """
+    Accepts dd-mm-yyyy (as documented), dd/mm/yyyy or yyyy-mm-dd.
+    """
+
+    if value is None:
+        return None
+
+    for fmt in ("%d-%m-%Y", API_DATE_FORMAT, "%Y-%m-%d"):
+        try:
+            return pd.to_datetime(value, format=fmt)
+        except (ValueError, TypeError):
+            continue
+
+    raise ValueError(f"Unrecognised date: {value}")
+
+
+def records_to_frame(records):
+    """
+    Typed frame: string names, float Modal_Price, datetime64 Price_Date.
+    Rows whose date cannot be parsed are dropped; a missing or non-numeric
+    modal price is left as NaN rather than read as a price of zero.
+    """
+
+    if not records:
+        return pd.DataFrame({
+            "Commodity": pd.Series(dtype=object),
+            "Market": pd.Series(dtype=object),
+            "State": pd.Series(dtype=object),
+            "Modal_Price": pd.Series(dtype="float64"),
+            "Price_Date": pd.Series(dtype="datetime64[ns]")
+        })
+
+    raw = pd.DataFrame.from_records(records)
+
+    df = pd.DataFrame({
+        "Commodity": raw.get("commodity"),
+        "Market": raw.get("market"),
+        "State": raw.get("state"),
+        "Modal_Price": pd.to_numeric(raw.get("modal_price"), errors="coerce").astype("float64"),
+        "Price_Date": pd.to_datetime(raw.get("arrival_date"), format=API_DATE_FORMAT, errors="coerce")
+    })
+
+    return df.dropna(subset=["Price_Date"]).reset_index(drop=True)
+
+
+def fetch_agmarknet_data(commodity=None, market=None, state=None, start_date=None, end_date=None,
+                         page_size=PAGE_SIZE, workers=MAX_WORKERS, arrival_date=None):
+    """
+    Fetches daily market price data from Agmarknet API (Govt. of India).
+    Every page matching the filters is fetched, not just the first one.
+    Params:
+        commodity (str): Name of the commodity/crop (e.g., 'Wheat')
+        market (str): Name of the mandi/market (e.g., 'Delhi')
+        state (str): State name (e.g., 'Delhi')
+        start_date (str): Start date in 'dd-mm-yyyy' format
+        end_date (str): End date in 'dd-mm-yyyy' format
+        arrival_date: single day filtered by the API itself, so only
+            that day's pages are downloaded (start_date / end_date are
+            applied after fetching)
+    Returns:
+        pd.DataFrame: DataFrame with columns ['Commodity', 'Market', 'State', 'Modal_Price', 'Price_Date'],
+        Price_Date as datetime64
+    """
+    # Use environment variable for API key and URL
+    url = os.getenv("AGMARKNET_API_URL", "https://api.data.gov.in/resource/9ef84268-d588-465a-a308-a864a43d0070")
+    apikey = os.getenv("AGMARKNET_API_KEY")
+    if not apikey:
+        raise Exception("AGMARKNET_API_KEY not set in environment variables.")
+    params = {
+        "api-key": apikey,
+        "format": "json",
+    }
+    if commodity:
+        params["filters[Commodity]"] = commodity
+    if market:
+        params["filters[Market]"] = market
+    if state:
+        params["filters[State]"] = state
+    if arrival_date is not None:
+        params["filters[Arrival_Date]"] = parse_date(arrival_date).strftime(API_DATE_FORMAT)
+    try:
+        records = fetch_all_records(url, params, page_size=page_size, workers=workers)
+    except requests.exceptions.RequestException as e:
+        raise Exception(f"Agmarknet API connection error: {e}")
+    df = records_to_frame(records)
+    if start_date:
+        df = df[df["Price_Date"] >= parse_date(start_date)]
+    if end_date:
+        df = df[df["Price_Date"] <= parse_date(end_date)]
+    return df.reset_index(drop=True)
+
+
 def fetch_varietywise_prices(commodity=None, variety=None, market=None, state=None, start_date=None, end_date=None):
     """
     Fetches variety-wise daily market price data from Data.gov.in API.
@@ -9,7 +181,7 @@ def fetch_varietywise_prices(commodity=None, variety=None, market=None, state=No
         start_date (str): Start date in 'yyyy-mm-dd' format
         end_date (str): End date in 'yyyy-mm-dd' format
     Returns:
-        pd.DataFrame: DataFrame with columns ['Commodity', 'Variety', 'Market', 'State', 'Modal_Price', 'Price_Date']
+        pd.DataFrame: raw API records, with arrival_date parsed to datetime64
     """
     url = os.getenv("VARIETYWISE_API_URL", "https://api.data.gov.in/resource/35985678-0d79-46b4-9ed6-6f13308a1d24")
     apikey = os.getenv("VARIETYWISE_API_KEY")
@@ -20,10 +192,7 @@ def fetch_varietywise_prices(commodity=None, variety=None, market=None, state=No
     params = {
         "api-key": apikey,
         "format": api_format,
-        "limit": 100,
     }
-    if filter_str:
-        params["filters[]"] = filter_str
 
     filters = []
     if commodity:
@@ -36,90 +205,21 @@ def fetch_varietywise_prices(commodity=None, variety=None, market=None, state=No
         filters.append(f"state:{state}")
     filter_str = "|".join(filters) if filters else None
 
-    session = requests.Session()
-    retries = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET"])
-    adapter = HTTPAdapter(max_retries=retries)
-    session.mount("https://", adapter)
-    session.mount("http://", adapter)
+    if filter_str:
+        params["filters[]"] = filter_str
+
     try:
-        response = session.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        records = fetch_all_records(url, params)
     except requests.exceptions.RequestException as e:
         raise Exception(f"Varietywise API connection error: {e}")
 
-    return pd.DataFrame(data.get("records", []))
-    if start_date:
-        df = df[df["Price_Date"] >= start_date]
-    if end_date:
-        df = df[df["Price_Date"] <= end_date]
-    return df.reset_index(drop=True)
-
-import requests
-import pandas as pd
-from datetime import datetime
-import os
-from dotenv import load_dotenv
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-
-load_dotenv()
-
-def fetch_agmarknet_data(commodity=None, market=None, state=None, start_date=None, end_date=None):
-    """
-    Fetches daily market price data from Agmarknet API (Govt. of India).
-    Params:
-        commodity (str): Name of the commodity/crop (e.g., 'Wheat')
-        market (str): Name of the mandi/market (e.g., 'Delhi')
-        state (str): State name (e.g., 'Delhi')
-        start_date (str): Start date in 'dd-mm-yyyy' format
-        end_date (str): End date in 'dd-mm-yyyy' format
-    Returns:
-        pd.DataFrame: DataFrame with columns ['Commodity', 'Market', 'State', 'Modal_Price', 'Price_Date']
-    """
-    # Use environment variable for API key and URL
-    url = os.getenv("AGMARKNET_API_URL", "https://api.data.gov.in/resource/9ef84268-d588-465a-a308-a864a43d0070")
-    apikey = os.getenv("AGMARKNET_API_KEY")
-    if not apikey:
-        raise Exception("AGMARKNET_API_KEY not set in environment variables.")
-    params = {
-        "api-key": apikey,
-        "format": "json",
-        "limit": 100,
-    }
-    if commodity:
-        params["filters[Commodity]"] = commodity
-    if market:
-        params["filters[Market]"] = market
-    if state:
-        params["filters[State]"] = state
-    session = requests.Session()
-    retries = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET"])
-    adapter = HTTPAdapter(max_retries=retries)
-    session.mount("https://", adapter)
-    session.mount("http://", adapter)
-    try:
-        response = session.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Agmarknet API connection error: {e}")
-    records = []
-    for item in data.get("records", []):
-        try:
-            modal_price = float(item.get("modal_price", 0))
-        except Exception:
-            modal_price = 0
-        records.append({
-            "Commodity": item.get("commodity"),
-            "Market": item.get("market"),
-            "State": item.get("state"),
-            "Modal_Price": modal_price,
-            "Price_Date": item.get("arrival_date"),
-        })
     df = pd.DataFrame(records)
+    if df.empty or "arrival_date" not in df.columns:
+        return df
+
+    df["arrival_date"] = pd.to_datetime(df["arrival_date"], format=API_DATE_FORMAT, errors="coerce")
     if start_date:
-        df = df[df["Price_Date"] >= start_date]
+        df = df[df["arrival_date"] >= parse_date(start_date)]
     if end_date:
-        df = df[df["Price_Date"] <= end_date]
+        df = df[df["arrival_date"] <= parse_date(end_date)]
     return df.reset_index(drop=True)
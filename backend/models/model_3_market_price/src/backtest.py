@@ -0,0 +1,246 @@
+"""
+Walk-forward backtest of the per-mandi price forecaster.
+
+For every (crop, mandi) series, FOLDS forecast origins are placed HORIZON
+days apart, ending HORIZON days before the last price. At each origin a
+forest is fit on the history up to it, exactly as train_model.py fits
+production models, and predict_next_days' recursive forecast is run for
+HORIZON days. Forecast days are matched against the prices actually
+reported on those days (mandis don't report every day).
+
+The folds of a series are forecast together through a ForestBundle and
+series run in parallel processes. Errors are aggregated per horizon step
+into a summary table (MAE, MAPE) plus a per-series table, both written
+as CSV.
+
+Run from the repository root:
+    python -m backend.models.model_3_market_price.src.backtest [--folds 3] [--horizon 14] [--workers N]
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from backend.models.common.forest_runtime import CompiledForest, ForestBundle
+from backend.models.model_3_market_price.src.forecaster import LAG_COUNT, forecast_recursive_batch
+from backend.models.model_3_market_price.src.price_warehouse import load_price_history
+from backend.models.model_3_market_price.src.train_model import MIN_ROWS, fit_series_model
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+BACKTEST_DIR = os.path.join(BASE_DIR, "data", "backtests")
+
+FOLDS = 3
+HORIZON = 14
+
+
+def fold_cutoffs(dates, folds, horizon):
+    """
+    Number of rows before each forecast origin, oldest origin first. Folds
+    that would leave fewer than MIN_ROWS training rows are dropped.
+    """
+
+    origins = dates[-1] - horizon * np.arange(folds, 0, -1)
+    cutoffs = np.unique(np.searchsorted(dates, origins, side="right"))
+
+    return cutoffs[(cutoffs >= MIN_ROWS) & (cutoffs < len(dates))]
+
+
+def actuals_on_grid(dates, prices, cutoffs, horizon):
+    """
+    (folds, horizon) matrix of the price reported on each forecast day,
+    NaN where the mandi reported nothing.
+    """
+
+    actual = np.full((len(cutoffs), horizon), np.nan)
+
+    steps = (dates[None, :] - dates[cutoffs - 1][:, None]).astype(np.int64)
+    fold_index, row_index = np.nonzero((steps >= 1) & (steps <= horizon))
+
+    actual[fold_index, steps[fold_index, row_index] - 1] = prices[row_index]
+
+    return actual
+
+
+def backtest_series(group, folds=FOLDS, horizon=HORIZON):
+    """
+    Walk-forward evaluation of one series; runs inside a worker process.
+    Returns per-step error sums and counts, or None when the series is too
+    short for a single fold.
+    """
+
+    start = time.perf_counter()
+
+    group = group.sort_values("Price Date")
+    dates = pd.to_datetime(group["Price Date"]).to_numpy().astype("datetime64[D]")
+    prices = group["Modal_Price"].to_numpy(dtype=np.float64)
+
+    cutoffs = fold_cutoffs(dates, folds, horizon)
+
+    if len(cutoffs) == 0:
+        return None
+
+    bundle = ForestBundle(
+        CompiledForest.from_sklearn(fit_series_model(group.iloc[:cutoff])[0])
+        for cutoff in cutoffs
+    )
+
+    _, forecast = forecast_recursive_batch(
+        bundle,
+        np.arange(len(cutoffs)),
+        np.stack([prices[cutoff - LAG_COUNT:cutoff] for cutoff in cutoffs]),
+        dates[cutoffs - 1],
+        horizon
+    )
+
+    actual = actuals_on_grid(dates, prices, cutoffs, horizon)
+
+    observed = ~np.isnan(actual)
+    errors = np.where(observed, np.abs(forecast - actual), 0.0)
+    priced = observed & (actual > 0)
+    pct_errors = np.where(priced, errors / np.where(priced, actual, 1.0) * 100, 0.0)
+
+    return {
+        "folds": len(cutoffs),
+        "abs_error": errors.sum(axis=0),
+        "pct_error": pct_errors.sum(axis=0),
+        "observations": observed.sum(axis=0),
+        "priced": priced.sum(axis=0),
+        "seconds": time.perf_counter() - start
+    }
+
+
+def summarize(results, horizon):
+    """
+    Per horizon step MAE / MAPE over all series, plus an "all" row.
+    """
+
+    abs_error = np.stack([r["abs_error"] for r in results])
+    pct_error = np.stack([r["pct_error"] for r in results])
+    observations = np.stack([r["observations"] for r in results])
+    priced = np.stack([r["priced"] for r in results])
+
+    n = observations.sum(axis=0)
+    n_priced = priced.sum(axis=0)
+
+    summary = pd.DataFrame({
+        "step": np.arange(1, horizon + 1),
+        "series": (observations > 0).sum(axis=0),
+        "observations": n,
+        "mae": abs_error.sum(axis=0) / np.maximum(n, 1),
+        "mape": pct_error.sum(axis=0) / np.maximum(n_priced, 1)
+    })
+
+    total = pd.DataFrame([{
+        "step": "all",
+        "series": len(results),
+        "observations": n.sum(),
+        "mae": abs_error.sum() / max(n.sum(), 1),
+        "mape": pct_error.sum() / max(n_priced.sum(), 1)
+    }])
+
+    return pd.concat([summary, total], ignore_index=True).round({"mae": 2, "mape": 2})
+
+
+def run_backtest(folds=FOLDS, horizon=HORIZON, workers=None, limit=None, out_dir=None):
+
+    run_start = time.perf_counter()
+
+    df = load_price_history()
+
+    jobs = [
+        (crop, mandi, group[["Price Date", "Modal_Price"]])
+        for (crop, mandi), group in df.groupby(["Commodity", "Market Name"])
+        if len(group) >= MIN_ROWS
+    ]
+    if limit:
+        jobs = jobs[:limit]
+
+    results = []
+    series_rows = []
+    failures = []
+    too_short = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+
+        futures = {
+            pool.submit(backtest_series, group, folds, horizon): (crop, mandi)
+            for crop, mandi, group in jobs
+        }
+
+        for future in as_completed(futures):
+            crop, mandi = futures[future]
+
+            # One bad series is reported, not allowed to end the run
+            try:
+                result = future.result()
+            except Exception as e:
+                failures.append({"crop": crop, "mandi": mandi, "error": f"{type(e).__name__}: {e}"})
+                print(f" Failed: {crop} - {mandi} ({failures[-1]['error']})")
+                continue
+
+            if result is None:
+                too_short += 1
+                continue
+
+            results.append(result)
+            observations = result["observations"].sum()
+            priced = result["priced"].sum()
+
+            series_rows.append({
+                "crop": crop,
+                "mandi": mandi,
+                "folds": result["folds"],
+                "observations": observations,
+                "mae": round(result["abs_error"].sum() / max(observations, 1), 2),
+                "mape": round(result["pct_error"].sum() / max(priced, 1), 2),
+                "seconds": round(result["seconds"], 3)
+            })
+
+    out_dir = out_dir or BACKTEST_DIR
+    failures_path = os.path.join(out_dir, "backtest_failures.csv")
+
+    if failures:
+        os.makedirs(out_dir, exist_ok=True)
+        pd.DataFrame(failures).to_csv(failures_path, index=False)
+    elif os.path.exists(failures_path):
+        os.remove(failures_path)
+
+    if not results:
+        print(" No series long enough to backtest" if not failures else f" All {len(failures)} series failed")
+        return None
+
+    summary = summarize(results, horizon)
+    series = pd.DataFrame(series_rows).sort_values(["crop", "mandi"])
+
+    os.makedirs(out_dir, exist_ok=True)
+    summary.to_csv(os.path.join(out_dir, "backtest_summary.csv"), index=False)
+    series.to_csv(os.path.join(out_dir, "backtest_series.csv"), index=False)
+
+    wall_clock = time.perf_counter() - run_start
+
+    print(f"\n Backtested {len(results)} series ({folds} folds x {horizon} days) in {wall_clock:.1f}s")
+    if too_short:
+        print(f" Too short for a fold: {too_short}")
+    if failures:
+        print(f" Failed: {len(failures)} (see {failures_path})")
+    print(f" Median series MAPE: {series['mape'].median():.2f}%\n")
+    print(summary.to_string(index=False))
+    print(f"\n Written to {out_dir}")
+
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the per-mandi price forecaster")
+    parser.add_argument("--folds", type=int, default=FOLDS, help="forecast origins per series")
+    parser.add_argument("--horizon", type=int, default=HORIZON, help="days forecast from each origin")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--limit", type=int, default=None, help="only backtest the first N series")
+    parser.add_argument("--out", default=None, help="output directory (default: data/backtests)")
+    args = parser.parse_args()
+
+    run_backtest(folds=args.folds, horizon=args.horizon, workers=args.workers, limit=args.limit, out_dir=args.out)
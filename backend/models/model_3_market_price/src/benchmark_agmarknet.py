@@ -0,0 +1,131 @@
+"""
+Benchmark of the paginated Agmarknet client against a local stub of the
+data.gov.in resource API (no network, no API key needed).
+
+The stub serves N synthetic records with a fixed per-request latency, so
+the numbers show what concurrency buys over walking pages one by one.
+
+Run from the repository root:
+    python -m backend.models.model_3_market_price.src.benchmark_agmarknet
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from . import agmarknet_api
+
+N_RECORDS = 20000
+LATENCY_SECONDS = 0.05
+PAGE_SIZE = 1000
+REPEATS = 3
+
+
+def make_records(n):
+    start = date(2015, 1, 1)
+    return [
+        {
+            "state": "Delhi",
+            "district": "Delhi",
+            "market": "Azadpur",
+            "commodity": "Wheat",
+            "arrival_date": (start + timedelta(days=i)).strftime("%d/%m/%Y"),
+            "modal_price": str(2000 + i % 400)
+        }
+        for i in range(n)
+    ]
+
+
+def make_handler(records):
+
+    class StubHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            offset = int(query.get("offset", ["0"])[0])
+            limit = int(query.get("limit", ["10"])[0])
+
+            time.sleep(LATENCY_SECONDS)
+
+            page = records[offset:offset + limit]
+            body = json.dumps({
+                "total": len(records),
+                "count": len(page),
+                "offset": offset,
+                "limit": limit,
+                "records": page
+            }).encode("utf-8")
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def fetch_sequential(url, params, page_size):
+    """
+    Baseline: one page after another, new session per request (as before).
+    """
+    records = []
+    offset = 0
+    while True:
+        response = requests.Session().get(url, params=dict(params, offset=offset, limit=page_size), timeout=10)
+        page = response.json()
+        records.extend(page["records"])
+        offset += page_size
+        if offset >= page["total"]:
+            return records
+
+
+def timed(fn):
+    best = float("inf")
+    result = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+
+    records = make_records(N_RECORDS)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(records))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    url = f"http://127.0.0.1:{server.server_port}/resource"
+    os.environ["AGMARKNET_API_URL"] = url
+    os.environ["AGMARKNET_API_KEY"] = "stub"
+
+    params = {"api-key": "stub", "format": "json"}
+    pages = -(-N_RECORDS // PAGE_SIZE)
+
+    print(f"{N_RECORDS} records, {pages} pages of {PAGE_SIZE}, {LATENCY_SECONDS * 1000:.0f} ms per request\n")
+
+    seconds, result = timed(lambda: fetch_sequential(url, params, PAGE_SIZE))
+    print(f"sequential pages       : {seconds:7.3f}s  ({len(result)} records)")
+
+    for workers in (2, 4, 8, 16):
+        seconds, df = timed(lambda: agmarknet_api.fetch_agmarknet_data(
+            commodity="Wheat", page_size=PAGE_SIZE, workers=workers
+        ))
+        print(f"concurrent, {workers:2d} workers : {seconds:7.3f}s  ({len(df)} rows, "
+              f"{df['Price_Date'].min().date()} .. {df['Price_Date'].max().date()})")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
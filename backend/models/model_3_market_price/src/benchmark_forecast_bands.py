@@ -0,0 +1,160 @@
+"""
+Cost of P10/P50/P90 forecast bands over the point forecast.
+
+For a sample of trained series, times predict_next_days' recursive
+forecast with and without bands (online, one series at a time), the same
+for the batched precompute path, and a per-tree scikit-learn loop as the
+naive way of getting tree outputs. Also checks that the point forecast is
+unchanged when bands are requested.
+
+Run from the repository root:
+    python -m backend.models.model_3_market_price.src.benchmark_forecast_bands [--series 20] [--days 7]
+"""
+
+import argparse
+import time
+
+import joblib
+import numpy as np
+
+from backend.models.common.forest_runtime import ForestBundle
+from backend.models.model_3_market_price.src.forecaster import (
+    LAG_COUNT,
+    QUANTILES,
+    forecast_dates,
+    forecast_recursive,
+    forecast_recursive_batch
+)
+from backend.models.model_3_market_price.src.model_registry import get_registry
+from backend.models.model_3_market_price.src.price_history import get_price_history_store
+
+N_SERIES = 20
+DAYS = 7
+REPEATS = 20
+
+
+def sample_series(registry, store, n_series):
+
+    series = []
+
+    for crop, mandi in store.keys():
+        s = store.get_series(crop, mandi)
+        if len(s) >= LAG_COUNT and registry.has_model(s.commodity, s.market):
+            series.append(s)
+        if len(series) == n_series:
+            break
+
+    return series
+
+
+def per_tree_loop(forest, recent_prices, last_date, days):
+    """
+    Bands the naive way: every step asks each sklearn tree separately.
+    """
+
+    lags = list(np.asarray(recent_prices, dtype=np.float64)[::-1])
+    dates = forecast_dates(last_date, days)
+    prices = np.empty(days)
+    bands = np.empty((days, len(QUANTILES)))
+
+    for step, date in enumerate(dates):
+        day = date.astype(object)
+        row = np.array([[lags[0], lags[1], lags[2], day.month, day.weekday()]])
+        trees = np.array([tree.predict(row)[0] for tree in forest.estimators_])
+
+        prices[step] = trees.mean()
+        bands[step] = np.percentile(trees, QUANTILES)
+        lags = [prices[step]] + lags[:-1]
+
+    return dates, prices, bands
+
+
+def timed(fn, repeats=REPEATS):
+
+    timings = []
+
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    return float(np.median(timings)) * 1000
+
+
+def run_benchmark(n_series=N_SERIES, days=DAYS):
+
+    registry = get_registry()
+    store = get_price_history_store()
+
+    series = sample_series(registry, store, n_series)
+    if not series:
+        print(" No trained series with history found")
+        return None
+
+    models = [registry.get(s.commodity, s.market, "mandi") for s in series]
+    inputs = [(s.tail(LAG_COUNT)[1], s.last_date) for s in series]
+
+    max_diff = 0.0
+    for model, (recent_prices, last_date) in zip(models, inputs):
+        _, point = forecast_recursive(model, recent_prices, last_date, days)
+        _, banded, bands = forecast_recursive(model, recent_prices, last_date, days, QUANTILES)
+        max_diff = max(max_diff, float(np.abs(point - banded).max()))
+        assert np.all(bands[:, 0] <= bands[:, -1])
+
+    def online(quantiles):
+        for model, (recent_prices, last_date) in zip(models, inputs):
+            forecast_recursive(model, recent_prices, last_date, days, quantiles)
+
+    point_ms = timed(lambda: online(None)) / len(series)
+    banded_ms = timed(lambda: online(QUANTILES)) / len(series)
+
+    report = {
+        "series": len(series),
+        "days": days,
+        "point_max_abs_diff": max_diff,
+        "online_point_ms": round(point_ms, 3),
+        "online_banded_ms": round(banded_ms, 3),
+        "online_overhead_pct": round((banded_ms / point_ms - 1) * 100, 1)
+    }
+
+    groups = {}
+    for i, model in enumerate(models):
+        groups.setdefault((model.n_trees, model.n_features_in_), []).append(i)
+    members = max(groups.values(), key=len)
+
+    bundle = ForestBundle(models[i] for i in members)
+    recent = np.stack([inputs[i][0] for i in members])
+    last_dates = np.array([inputs[i][1] for i in members], dtype="datetime64[D]")
+    ids = np.arange(len(members))
+
+    batch_point_ms = timed(lambda: forecast_recursive_batch(bundle, ids, recent, last_dates, days))
+    batch_banded_ms = timed(lambda: forecast_recursive_batch(bundle, ids, recent, last_dates, days, QUANTILES))
+
+    report.update({
+        "batch_series": len(members),
+        "batch_point_ms": round(batch_point_ms, 3),
+        "batch_banded_ms": round(batch_banded_ms, 3),
+        "batch_overhead_pct": round((batch_banded_ms / batch_point_ms - 1) * 100, 1)
+    })
+
+    first = series[0]
+    forest = joblib.load(registry.model_path(first.commodity, first.market))
+    report["per_tree_loop_ms"] = round(timed(lambda: per_tree_loop(forest, *inputs[0], days), repeats=3), 3)
+
+    print(f"\n{len(series)} series, {days}-day forecasts (point forecast max |diff| with bands: {max_diff})\n")
+    print(f" online, per series:    point {report['online_point_ms']} ms   "
+          f"banded {report['online_banded_ms']} ms   ({report['online_overhead_pct']:+}%)")
+    print(f" batched, {len(members)} series:  point {report['batch_point_ms']} ms   "
+          f"banded {report['batch_banded_ms']} ms   ({report['batch_overhead_pct']:+}%)")
+    print(f" per-tree sklearn loop: {report['per_tree_loop_ms']} ms per series")
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark forecast bands against point forecasts")
+    parser.add_argument("--series", type=int, default=N_SERIES, help="trained series to sample")
+    parser.add_argument("--days", type=int, default=DAYS, help="forecast horizon")
+    args = parser.parse_args()
+
+    run_benchmark(n_series=args.series, days=args.days)
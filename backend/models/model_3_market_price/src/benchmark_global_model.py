@@ -0,0 +1,214 @@
+"""
+Global price model vs per-mandi forests on the same price history.
+
+The last HOLDOUT_DAYS calendar days of every series are held out.
+Per-mandi forests are trained exactly as train_model.py does (on a sample
+of series with at least MIN_ROWS rows), the global model once over every
+series. Both then forecast recursively from the end of the training part
+through the last holdout date; each holdout price is scored against the
+forecast for its own date (days the mandi didn't report are skipped).
+
+Reports compiled model memory, load time, 7-day forecast latency and
+holdout MAE / MAPE, plus global-model error on the thin series the
+per-mandi pipeline skips.
+
+Run from the repository root:
+    python -m backend.models.model_3_market_price.src.benchmark_global_model [--series 50]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from backend.models.common.forest_runtime import load_compiled
+from backend.models.model_3_market_price.src.backtest import actuals_on_grid
+from backend.models.model_3_market_price.src.forecaster import LAG_COUNT, forecast_recursive
+from backend.models.model_3_market_price.src.global_model import (
+    MIN_ROWS as GLOBAL_MIN_ROWS,
+    GlobalPriceModel,
+    SeriesEncodings,
+    build_global_features,
+    fit_global_forest
+)
+from backend.models.model_3_market_price.src.model_registry import model_file_name
+from backend.models.model_3_market_price.src.price_warehouse import get_warehouse, load_price_history
+from backend.models.model_3_market_price.src.train_model import MIN_ROWS, train_series
+
+HOLDOUT_DAYS = 14
+N_SERIES = 50
+LATENCY_DAYS = 7
+
+
+def split_series(df, holdout_days):
+    """
+    {(crop, mandi): (train_frame, holdout_frame)}: the holdout is every row
+    in the last holdout_days days of the series, for series long enough to
+    leave a training part before them.
+    """
+
+    df = df.assign(**{"Price Date": pd.to_datetime(df["Price Date"])})
+    splits = {}
+
+    for (crop, mandi), group in df.groupby(["Commodity", "Market Name"]):
+        group = group.sort_values("Price Date")
+        dates = group["Price Date"].to_numpy().astype("datetime64[D]")
+        cutoff = np.searchsorted(dates, dates[-1] - np.timedelta64(holdout_days, "D"), side="right")
+        if cutoff < GLOBAL_MIN_ROWS:
+            continue
+        splits[(crop, mandi)] = (group.iloc[:cutoff], group.iloc[cutoff:])
+
+    return splits
+
+
+def backtest(model, train, holdout):
+    """
+    (MAE, MAPE) of a recursive forecast from the end of train through the
+    last holdout date, scored on the dates the holdout has prices for.
+    """
+
+    series = pd.concat([train, holdout])
+    dates = series["Price Date"].to_numpy().astype("datetime64[D]")
+    prices = series["Modal_Price"].to_numpy(dtype=np.float64)
+
+    cutoff = len(train)
+    horizon = int((dates[-1] - dates[cutoff - 1]).astype(np.int64))
+
+    actual = actuals_on_grid(dates, prices, np.array([cutoff]), horizon)[0]
+
+    _, forecast = forecast_recursive(model, prices[cutoff - LAG_COUNT:cutoff], dates[cutoff - 1], horizon)
+
+    reported = ~np.isnan(actual)
+    errors = np.abs(forecast[reported] - actual[reported])
+
+    return errors.mean(), (errors / np.maximum(np.abs(actual[reported]), 1e-8)).mean() * 100
+
+
+def time_forecasts(models, splits, keys):
+
+    timings = []
+
+    for key in keys:
+        train, _ = splits[key]
+        prices = train["Modal_Price"].to_numpy(dtype=np.float64)[-LAG_COUNT:]
+        last_date = np.datetime64(train["Price Date"].iloc[-1], "D")
+
+        start = time.perf_counter()
+        forecast_recursive(models[key], prices, last_date, LATENCY_DAYS)
+        timings.append(time.perf_counter() - start)
+
+    return float(np.median(timings)) * 1000
+
+
+def run_benchmark(df=None, n_series=N_SERIES, holdout_days=HOLDOUT_DAYS, seed=42):
+
+    df = load_price_history() if df is None else df
+    splits = split_series(df, holdout_days)
+
+    rich = sorted(key for key, (train, _) in splits.items() if len(train) >= MIN_ROWS)
+    thin = sorted(key for key, (train, _) in splits.items() if len(train) < MIN_ROWS)
+
+    rng = np.random.default_rng(seed)
+    sample = [rich[i] for i in sorted(rng.choice(len(rich), min(n_series, len(rich)), replace=False))]
+
+    work_dir = tempfile.mkdtemp(prefix="global_model_benchmark_")
+
+    # Per-mandi forests, trained like train_model.py
+    start = time.perf_counter()
+    for crop, mandi in sample:
+        train_series(splits[(crop, mandi)][0], os.path.join(work_dir, model_file_name(crop, mandi)))
+    mandi_train_seconds = time.perf_counter() - start
+
+    # One global model over the training part of every series
+    start = time.perf_counter()
+    train_frame = pd.concat([train for train, _ in splits.values()])
+    market_states = get_warehouse().market_states()
+    encodings = SeriesEncodings.from_frame(train_frame, market_states)
+    global_path = os.path.join(work_dir, "global", "global_price_model.pkl")
+    encodings_path = os.path.join(work_dir, "global", "encodings.json")
+    os.makedirs(os.path.dirname(global_path))
+    joblib.dump(fit_global_forest(build_global_features(train_frame, encodings)), global_path)
+    with open(encodings_path, "w") as f:
+        json.dump(encodings.to_json(), f)
+    global_train_seconds = time.perf_counter() - start
+
+    # Load time and memory
+    start = time.perf_counter()
+    mandi_models = {
+        (crop, mandi): load_compiled(os.path.join(work_dir, model_file_name(crop, mandi)))
+        for crop, mandi in sample
+    }
+    mandi_load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    global_model = GlobalPriceModel.load(global_path, encodings_path)
+    global_load_seconds = time.perf_counter() - start
+
+    global_models = {key: global_model.for_series(*key) for key in splits}
+
+    mandi_disk = sum(os.path.getsize(os.path.join(work_dir, model_file_name(*key))) for key in sample)
+
+    # Holdout error
+    mandi_errors = np.array([backtest(mandi_models[key], *splits[key]) for key in sample])
+    global_errors = np.array([backtest(global_models[key], *splits[key]) for key in sample])
+    thin_errors = np.array([backtest(global_models[key], *splits[key]) for key in thin]) if thin else None
+
+    mandi_latency = time_forecasts(mandi_models, splits, sample)
+    global_latency = time_forecasts(global_models, splits, sample)
+    global_disk = os.path.getsize(global_path)
+
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "series_compared": len(sample),
+        "thin_series": len(thin),
+        "holdout_days": holdout_days,
+        "per_mandi": {
+            "train_seconds": round(mandi_train_seconds, 2),
+            "load_seconds": round(mandi_load_seconds, 3),
+            "compiled_mb": round(sum(m.nbytes for m in mandi_models.values()) / 1e6, 2),
+            "disk_mb": round(mandi_disk / 1e6, 2),
+            "latency_ms": round(mandi_latency, 3),
+            "mae": round(float(mandi_errors[:, 0].mean()), 2),
+            "mape": round(float(mandi_errors[:, 1].mean()), 2)
+        },
+        "global": {
+            "train_seconds": round(global_train_seconds, 2),
+            "load_seconds": round(global_load_seconds, 3),
+            "compiled_mb": round(global_model.nbytes / 1e6, 2),
+            "disk_mb": round(global_disk / 1e6, 2),
+            "latency_ms": round(global_latency, 3),
+            "mae": round(float(global_errors[:, 0].mean()), 2),
+            "mape": round(float(global_errors[:, 1].mean()), 2),
+            "thin_mae": round(float(thin_errors[:, 0].mean()), 2) if thin_errors is not None else None,
+            "thin_mape": round(float(thin_errors[:, 1].mean()), 2) if thin_errors is not None else None
+        }
+    }
+
+    print(f"\n{len(sample)} series compared, {len(thin)} thin series (global only), "
+          f"{holdout_days}-day holdout\n")
+    print(f"{'':16}{'per-mandi':>12}{'global':>12}")
+    for label, field in [("train (s)", "train_seconds"), ("load (s)", "load_seconds"),
+                         ("compiled (MB)", "compiled_mb"), ("disk (MB)", "disk_mb"),
+                         (f"{LATENCY_DAYS}-day (ms)", "latency_ms"), ("MAE", "mae"), ("MAPE (%)", "mape")]:
+        print(f"{label:16}{report['per_mandi'][field]:>12}{report['global'][field]:>12}")
+    if thin_errors is not None:
+        print(f"\nthin series, global model: MAE {report['global']['thin_mae']}, "
+              f"MAPE {report['global']['thin_mape']}%")
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the global price model against per-mandi forests")
+    parser.add_argument("--series", type=int, default=N_SERIES, help="per-mandi series to compare")
+    parser.add_argument("--holdout", type=int, default=HOLDOUT_DAYS, help="days held out at the end of each series")
+    args = parser.parse_args()
+
+    run_benchmark(n_series=args.series, holdout_days=args.holdout)
@@ -1,42 +1,257 @@
 import pandas as pd
+import numpy as np
+import argparse
+import json
 import os
+import threading
+import time
+from datetime import datetime
+
+import requests
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 EXPORT_PATH = os.path.join(BASE_DIR, "data", "export", "export_prices.csv")
+FX_RATES_PATH = os.path.join(BASE_DIR, "data", "export", "fx_rates.json")
+
+# Used when the rates file is missing or has no INR rate
+DEFAULT_USD_TO_INR = 83.0
+
+# Share of the export price left after freight, duties and handling
+NET_PRICE_FACTOR = 0.9
+
+# How often the rates file is checked for changes
+FX_CHECK_SECONDS = 60
+
+
+class FxRates:
+    """
+    USD based rates read from a local JSON file
+    ({"base": "USD", "rates": {"INR": 83.2}, "updated_at": ...}).
+    The file is re-read only when its mtime changes.
+    """
+
+    def __init__(self, path=FX_RATES_PATH):
+
+        self.path = path
+        self.rates = {}
+        self.updated_at = None
+
+        self._mtime = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def _reload(self):
+
+        now = time.monotonic()
+
+        if now - self._checked < FX_CHECK_SECONDS and self._mtime is not None:
+            return
+
+        with self._lock:
+            self._checked = now
+            mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+
+            if mtime == self._mtime:
+                return
+
+            rates, updated_at = {}, None
+            if mtime is not None:
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+                rates = {code.upper(): float(rate) for code, rate in data.get("rates", {}).items()}
+                updated_at = data.get("updated_at")
+
+            self.rates = rates
+            self.updated_at = updated_at
+            self._mtime = mtime
+
+    def rate(self, currency="INR"):
+
+        self._reload()
+
+        if currency.upper() == "INR":
+            return self.rates.get("INR", DEFAULT_USD_TO_INR)
+
+        return self.rates[currency.upper()]
+
+    def save(self, rates):
+        """
+        Writes new rates atomically; running workers pick them up on their
+        next check.
+        """
+
+        tmp_path = self.path + ".tmp"
+
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "base": "USD",
+                "rates": rates,
+                "updated_at": datetime.now().isoformat(timespec="seconds")
+            }, f, indent=4)
+
+        os.replace(tmp_path, self.path)
+
+        with self._lock:
+            self._mtime = None
+            self._checked = 0.0
+
+    def refresh_from_url(self, url):
+        """
+        Pulls rates from an exchangerate API returning {"rates": {...}}
+        against USD and stores them locally.
+        """
+
+        response = requests.get(url, timeout=10)
+        response.raise_for_status()
+
+        rates = {code.upper(): float(rate) for code, rate in response.json()["rates"].items()}
+        self.save(rates)
+
+        return rates
+
+
+class ExportPriceTable:
+    """
+    export_prices.csv held as NumPy arrays sorted by crop, so all
+    destinations for a crop are one contiguous slice.
+    """
+
+    def __init__(self, crops, countries, usd_prices):
+
+        crops = np.asarray([str(c).lower() for c in crops], dtype=object)
+        order = np.argsort(crops, kind="stable")
+
+        self.crops = crops[order]
+        self.countries = np.asarray(countries, dtype=object)[order]
+        self.usd_prices = np.asarray(usd_prices, dtype=np.float64)[order]
+
+        names, starts = np.unique(self.crops, return_index=True)
+        ends = np.append(starts[1:], len(self.crops))
+        self.index = {name: (start, end) for name, start, end in zip(names, starts, ends)}
+
+    @classmethod
+    def from_csv(cls, path=EXPORT_PATH):
+        df = pd.read_csv(path)
+        # The file has a repeated header row part-way down; drop non-numeric prices
+        df["usd_price_per_ton"] = pd.to_numeric(df["usd_price_per_ton"], errors="coerce")
+        df = df.dropna(subset=["usd_price_per_ton"])
+        return cls(df["crop"], df["country"], df["usd_price_per_ton"])
+
+    def lookup(self, crop):
+
+        start, end = self.index.get(crop.lower(), (0, 0))
+
+        return self.countries[start:end], self.usd_prices[start:end]
+
+    @staticmethod
+    def _result(countries, net_prices, profits, best):
+
+        if best is None:
+            return {
+                "best_country": None,
+                "best_profit": float("-inf"),
+                "all_options": []
+            }
+
+        return {
+            "best_country": countries[best],
+            "best_profit": round(float(profits[best]), 2),
+            "all_options": [
+                {
+                    "country": country,
+                    "net_export_price": round(float(net), 2),
+                    "profit_margin": round(float(profit), 2)
+                }
+                for country, net, profit in zip(countries, net_prices, profits)
+            ]
+        }
+
+    def analyze(self, crop, predicted_price, usd_to_inr_rate):
+
+        countries, usd_prices = self.lookup(crop)
+
+        net_prices = usd_prices * (usd_to_inr_rate * NET_PRICE_FACTOR)
+        profits = net_prices - predicted_price
+
+        best = int(np.argmax(profits)) if len(profits) else None
+
+        return self._result(countries, net_prices, profits, best)
+
+    def analyze_batch(self, crops, predicted_prices, usd_to_inr_rate):
+        """
+        Evaluates many (crop, predicted_price) pairs; one broadcast per crop
+        gives the margin of every pair against every destination.
+        """
+
+        predicted_prices = np.asarray(predicted_prices, dtype=np.float64)
+        keys = np.asarray([str(c).lower() for c in crops], dtype=object)
+        results = [None] * len(keys)
+
+        for crop in set(keys):
+            rows = np.flatnonzero(keys == crop)
+            countries, usd_prices = self.lookup(crop)
+
+            net_prices = usd_prices * (usd_to_inr_rate * NET_PRICE_FACTOR)
+            profits = net_prices[None, :] - predicted_prices[rows, None]
+            best = profits.argmax(axis=1) if len(countries) else [None] * len(rows)
+
+            for i, row in enumerate(rows):
+                results[row] = self._result(countries, net_prices, profits[i], best[i])
+
+        return results
+
+
+fx_rates = FxRates()
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def get_export_table():
+
+    global _table
+
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                _table = ExportPriceTable.from_csv()
+
+    return _table
 
 
 def usd_to_inr(amount):
-    return amount * 83
+    return amount * fx_rates.rate("INR")
 
 
 def analyze_export(crop, predicted_price):
+    return get_export_table().analyze(crop, predicted_price, fx_rates.rate("INR"))
+
+
+def analyze_export_batch(items):
+    """
+    items: iterable of (crop, predicted_price) pairs; results come back in
+    the same order, each shaped like analyze_export's.
+    """
+
+    items = list(items)
 
-    df = pd.read_csv(EXPORT_PATH)
-    df = df[df["crop"].str.lower() == crop.lower()]
+    if not items:
+        return []
 
-    best_country = None
-    best_profit = float("-inf")
-    options = []
+    crops, prices = zip(*items)
 
-    for _, row in df.iterrows():
-        usd_price = float(row["usd_price_per_ton"])
-        inr_price = usd_to_inr(usd_price)
-        net_price = inr_price * 0.9
+    return get_export_table().analyze_batch(crops, prices, fx_rates.rate("INR"))
 
-        profit = net_price - predicted_price
 
-        options.append({
-            "country": row["country"],
-            "net_export_price": round(net_price, 2),
-            "profit_margin": round(profit, 2)
-        })
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the local FX rates file")
+    parser.add_argument("--inr", type=float, help="set the USD to INR rate")
+    parser.add_argument("--url", default=os.getenv("FX_RATES_URL"), help="fetch USD rates from this URL")
+    args = parser.parse_args()
 
-        if profit > best_profit:
-            best_profit = profit
-            best_country = row["country"]
+    if args.inr is not None:
+        fx_rates.save({"INR": args.inr})
+    elif args.url:
+        fx_rates.refresh_from_url(args.url)
 
-    return {
-        "best_country": best_country,
-        "best_profit": round(best_profit, 2),
-        "all_options": options
-    }
+    print(f"USD to INR: {fx_rates.rate('INR')} (updated {fx_rates.updated_at})")
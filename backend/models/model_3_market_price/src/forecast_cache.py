@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+MAX_CACHED_FORECASTS = int(os.getenv("FORECAST_CACHE_SIZE", "4096"))
+
+
+class _Pending:
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.seconds = 0.0
+
+
+class ForecastCache:
+    """
+    LRU of finished forecasts keyed by (crop, mandi, days, ...,
+    data_version, model_version). The versions change whenever new prices land or the
+    model is retrained, so stale answers are never served; when a newer
+    version of the same forecast is stored the old one is
+    dropped straight away.
+
+    Identical requests that arrive while the forecast is being computed
+    wait for that computation instead of starting their own.
+    """
+
+    def __init__(self, max_entries=MAX_CACHED_FORECASTS):
+
+        self.max_entries = max_entries
+
+        self._entries = OrderedDict()  # key -> (result, compute_seconds)
+        self._current = {}  # key without its versions -> key
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+        self.compute_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    def get_or_compute(self, key, compute):
+        """
+        key is (crop, mandi, days, ..., data_version, model_version) - the
+        two versions last; compute() is called at most once per key at a time.
+        """
+
+        with self._lock:
+
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.saved_seconds += cached[1]
+                return cached[0]
+
+            pending = self._inflight.get(key)
+            owner = pending is None
+
+            if owner:
+                pending = _Pending()
+                self._inflight[key] = pending
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            with self._lock:
+                self.saved_seconds += pending.seconds
+            return pending.result
+
+        start = time.perf_counter()
+
+        try:
+            pending.result = compute()
+        except Exception as e:
+            pending.error = e
+            raise
+        finally:
+            pending.seconds = time.perf_counter() - start
+
+            with self._lock:
+                del self._inflight[key]
+                self.compute_seconds += pending.seconds
+
+                if pending.error is None:
+                    self._store(key, pending.result, pending.seconds)
+
+            pending.event.set()
+
+        return pending.result
+
+    def _store(self, key, result, seconds):
+
+        series = key[:-2]
+        previous = self._current.get(series)
+
+        if previous is not None and previous != key and previous in self._entries:
+            del self._entries[previous]
+            self.invalidations += 1
+
+        self._current[series] = key
+        self._entries[key] = (result, seconds)
+
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            if self._current.get(evicted[:-2]) == evicted:
+                del self._current[evicted[:-2]]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._current.clear()
+
+    def stats(self):
+
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "compute_seconds": round(self.compute_seconds, 3),
+                "saved_seconds": round(self.saved_seconds, 3),
+                "avg_compute_ms": round(self.compute_seconds * 1000 / self.misses, 2) if self.misses else 0.0
+            }
+
+
+forecast_cache = ForecastCache()
@@ -0,0 +1,130 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+FORECAST_DB_PATH = os.path.join(BASE_DIR, "data", "forecasts", "forecasts.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS forecasts (
+    crop TEXT NOT NULL,
+    mandi TEXT NOT NULL,
+    series_size INTEGER NOT NULL,
+    last_date TEXT NOT NULL,
+    model_version REAL NOT NULL,
+    horizon INTEGER NOT NULL,
+    generated_at REAL NOT NULL,
+    forecast TEXT NOT NULL,
+    PRIMARY KEY (crop, mandi)
+) WITHOUT ROWID
+"""
+
+
+class ForecastTable:
+    """
+    Materialized forecasts written by precompute_forecasts.py: one row per
+    (crop, mandi) holding the longest horizon, so shorter horizons are
+    prefixes. A row is only served while the series and model it was
+    computed from are unchanged.
+    """
+
+    def __init__(self, path=None):
+
+        path = path or FORECAST_DB_PATH
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(SCHEMA)
+        self._conn.commit()
+
+        self.hits = 0
+        self.stale = 0
+        self.missing = 0
+
+    def lookup(self, crop, mandi, days, data_version, model_version):
+        """
+        First days rows of the stored forecast, or None when there is no
+        fresh one covering that horizon.
+        """
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT series_size, last_date, model_version, horizon, forecast FROM forecasts WHERE crop = ? AND mandi = ?",
+                (crop, mandi)
+            ).fetchone()
+
+        if row is None or row[3] < days:
+            self.missing += 1
+            return None
+
+        series_size, last_date, stored_model_version, _, forecast = row
+
+        if (series_size, last_date) != tuple(data_version) or stored_model_version != model_version:
+            self.stale += 1
+            return None
+
+        self.hits += 1
+
+        return tuple(json.loads(forecast)[:days])
+
+    def write_many(self, entries):
+        """
+        entries: (crop, mandi, data_version, model_version, forecast rows).
+        """
+
+        now = time.time()
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO forecasts VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (crop, mandi, int(data_version[0]), str(data_version[1]), float(model_version),
+                     len(rows), now, json.dumps(list(rows)))
+                    for crop, mandi, data_version, model_version, rows in entries
+                )
+            )
+            self._conn.commit()
+
+    def stats(self):
+
+        with self._lock:
+            count, oldest, newest = self._conn.execute(
+                "SELECT COUNT(*), MIN(generated_at), MAX(generated_at) FROM forecasts"
+            ).fetchone()
+
+        return {
+            "path": self.path,
+            "series": count,
+            "oldest_generated_at": oldest,
+            "newest_generated_at": newest,
+            "hits": self.hits,
+            "stale": self.stale,
+            "missing": self.missing
+        }
+
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def get_forecast_table():
+    """
+    The materialized table, or None until the precompute job has created it.
+    """
+
+    global _table
+
+    if _table is None:
+        if not os.path.exists(FORECAST_DB_PATH):
+            return None
+        with _table_lock:
+            if _table is None:
+                _table = ForecastTable()
+
+    return _table
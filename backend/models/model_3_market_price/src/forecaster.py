@@ -0,0 +1,157 @@
+import numpy as np
+
+# Feature order used by train_model.py: lag_1, lag_2, lag_3, month, day_of_week
+LAG_COUNT = 3
+FEATURE_COUNT = LAG_COUNT + 2
+
+# Percentiles of the per-tree outputs reported as forecast bands
+QUANTILES = (10, 50, 90)
+
+
+def forecast_dates(last_date, days):
+    # A horizon below one day is an empty forecast, as the DataFrame loop gave
+    return np.datetime64(last_date, "D") + np.arange(1, max(days, 0) + 1)
+
+
+def calendar_features(dates):
+    """
+    Month (1-12) and pandas-style day of week (Monday=0) for datetime64[D].
+    """
+    months = dates.astype("datetime64[M]").astype(np.int64) % 12 + 1
+    # 1970-01-01 was a Thursday
+    days_of_week = (dates.astype(np.int64) + 3) % 7
+    return months, days_of_week
+
+
+def tree_quantiles(trees, quantiles):
+    """
+    Percentiles of per-tree outputs along the last axis, the same values
+    as np.percentile's default linear method but from one sort, which is
+    several times faster for the small tree counts used here.
+    """
+
+    trees = np.sort(trees, axis=-1)
+    n_trees = trees.shape[-1]
+
+    position = np.asarray(quantiles, dtype=np.float64) / 100 * (n_trees - 1)
+    lower = np.floor(position).astype(np.intp)
+    upper = np.minimum(lower + 1, n_trees - 1)
+    fraction = position - lower
+
+    return trees[..., lower] * (1 - fraction) + trees[..., upper] * fraction
+
+
+class LagRingBuffer:
+    """
+    Fixed-size buffer of the most recent prices; push overwrites the
+    oldest slot so each step costs the same regardless of history length.
+    """
+
+    def __init__(self, recent_prices, size=LAG_COUNT):
+
+        recent_prices = np.asarray(recent_prices, dtype=np.float64)[-size:]
+
+        if len(recent_prices) < size:
+            raise ValueError(f"Not enough historical data (minimum {size} days required).")
+
+        self.size = size
+        self.values = recent_prices.copy()
+        self.head = size - 1  # slot of the newest price
+
+    def push(self, price):
+        self.head = (self.head + 1) % self.size
+        self.values[self.head] = price
+
+    def fill_lags(self, out):
+        """
+        Writes lag_1 (newest) .. lag_n into out[:size].
+        """
+        for lag in range(self.size):
+            out[lag] = self.values[(self.head - lag) % self.size]
+
+
+def forecast_recursive(model, recent_prices, last_date, days, quantiles=None):
+    """
+    Recursive multi-step forecast: every predicted price becomes lag_1 of
+    the next step. Returns (dates, prices) arrays of length days.
+
+    With quantiles (percentiles such as QUANTILES) it also returns bands
+    of shape (days, len(quantiles)): the spread of the individual trees'
+    outputs at each step, read from the same traversal that gives the
+    point forecast. Bands are conditioned on the point forecast path.
+    """
+
+    lags = LagRingBuffer(recent_prices)
+
+    dates = forecast_dates(last_date, days)
+    days = len(dates)
+    months, days_of_week = calendar_features(dates)
+
+    prices = np.empty(days)
+    bands = np.empty((days, len(quantiles))) if quantiles is not None else None
+    row = np.empty((1, FEATURE_COUNT))
+
+    for step in range(days):
+        lags.fill_lags(row[0])
+        row[0, LAG_COUNT] = months[step]
+        row[0, LAG_COUNT + 1] = days_of_week[step]
+
+        if bands is None:
+            prices[step] = float(model.predict(row)[0])
+        else:
+            trees = model.tree_predictions(row)
+            prices[step] = trees.mean(axis=1)[0]
+            bands[step] = tree_quantiles(trees[0], quantiles)
+
+        lags.push(prices[step])
+
+    if bands is None:
+        return dates, prices
+
+    return dates, prices, bands
+
+
+def forecast_recursive_batch(bundle, forest_ids, recent_prices, last_dates, days, quantiles=None):
+    """
+    forecast_recursive for many series at once: row i is forecast by
+    forest forest_ids[i] of a ForestBundle, and every step is a single
+    bundle call. Returns (dates, prices), each of shape (n_series, days),
+    plus bands of shape (n_series, days, len(quantiles)) when quantiles
+    are given.
+    """
+
+    recent_prices = np.asarray(recent_prices, dtype=np.float64)[:, -LAG_COUNT:]
+
+    if recent_prices.shape[1] < LAG_COUNT:
+        raise ValueError(f"Not enough historical data (minimum {LAG_COUNT} days required).")
+
+    days = max(days, 0)
+    dates = np.asarray(last_dates, dtype="datetime64[D]")[:, None] + np.arange(1, days + 1)
+    months, days_of_week = calendar_features(dates)
+
+    # lag_1 (newest) first, like LagRingBuffer.fill_lags
+    lags = recent_prices[:, ::-1].copy()
+
+    prices = np.empty((len(lags), days))
+    bands = np.empty((len(lags), days, len(quantiles))) if quantiles is not None else None
+    rows = np.empty((len(lags), FEATURE_COUNT))
+
+    for step in range(days):
+        rows[:, :LAG_COUNT] = lags
+        rows[:, LAG_COUNT] = months[:, step]
+        rows[:, LAG_COUNT + 1] = days_of_week[:, step]
+
+        if bands is None:
+            prices[:, step] = bundle.predict(rows, forest_ids)
+        else:
+            trees = bundle.tree_predictions(rows, forest_ids)
+            prices[:, step] = trees.mean(axis=1)
+            bands[:, step] = tree_quantiles(trees, quantiles)
+
+        lags[:, 1:] = lags[:, :-1]
+        lags[:, 0] = prices[:, step]
+
+    if bands is None:
+        return dates, prices
+
+    return dates, prices, bands
@@ -0,0 +1,224 @@
+"""
+One price model shared by every (crop, mandi) series.
+
+It uses the per-mandi features (lag_1..lag_3, month, day_of_week) plus
+integer codes for crop, mandi and state, so a single forest can forecast
+thin mandis that are too short for a model of their own. Codes for names
+unseen at training time are -1.
+
+Train from the repository root:
+    python -m backend.models.model_3_market_price.src.global_model
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from backend.models.common.forest_runtime import load_compiled
+from backend.models.model_3_market_price.src.forecaster import FEATURE_COUNT
+from backend.models.model_3_market_price.src.price_history import normalize_name
+from backend.models.model_3_market_price.src.price_warehouse import get_warehouse, load_price_history
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+GLOBAL_MODEL_DIR = os.path.join(BASE_DIR, "models", "global")
+GLOBAL_MODEL_PATH = os.path.join(GLOBAL_MODEL_DIR, "global_price_model.pkl")
+GLOBAL_ENCODINGS_PATH = os.path.join(GLOBAL_MODEL_DIR, "encodings.json")
+
+SERIES_FEATURES = ["lag_1", "lag_2", "lag_3", "month", "day_of_week"]
+CODE_FEATURES = ["crop_code", "mandi_code", "state_code"]
+FEATURES = SERIES_FEATURES + CODE_FEATURES
+
+# Shortest series the global model learns from (enough for one lagged row)
+MIN_ROWS = 4
+
+N_ESTIMATORS = 100
+MIN_SAMPLES_LEAF = 3
+# Each tree sees a bootstrap of this share of all rows, which keeps the
+# forest a manageable size on the full history
+MAX_SAMPLES = 0.25
+
+
+class SeriesEncodings:
+
+    def __init__(self, crops, mandis, mandi_states):
+
+        self.crops = {name: code for code, name in enumerate(crops)}
+        self.mandis = {name: code for code, name in enumerate(mandis)}
+        self.states = {name: code for code, name in enumerate(sorted(set(mandi_states.values())))}
+        self.mandi_states = mandi_states
+
+    @classmethod
+    def from_frame(cls, df, market_states=None):
+
+        market_states = {normalize_name(k): v for k, v in (market_states or {}).items()}
+        mandis = sorted({normalize_name(m) for m in df["Market Name"].unique()})
+
+        return cls(
+            sorted({normalize_name(c) for c in df["Commodity"].unique()}),
+            mandis,
+            {mandi: market_states[mandi] for mandi in mandis if mandi in market_states}
+        )
+
+    def codes(self, crop, mandi):
+        crop, mandi = normalize_name(crop), normalize_name(mandi)
+        state = self.mandi_states.get(mandi)
+        return (
+            self.crops.get(crop, -1),
+            self.mandis.get(mandi, -1),
+            self.states.get(state, -1) if state is not None else -1
+        )
+
+    def to_json(self):
+        return {
+            "crops": sorted(self.crops, key=self.crops.get),
+            "mandis": sorted(self.mandis, key=self.mandis.get),
+            "mandi_states": self.mandi_states
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data["crops"], data["mandis"], data["mandi_states"])
+
+
+def build_global_features(df, encodings):
+    """
+    Lag and calendar features of every series in one pass (same values
+    as train_model.build_lag_features per group) plus the series codes.
+    """
+
+    df = df.assign(**{"Price Date": pd.to_datetime(df["Price Date"])})
+    df = df.sort_values(["Commodity", "Market Name", "Price Date"], kind="stable").copy()
+
+    prices = df.groupby(["Commodity", "Market Name"], sort=False)["Modal_Price"]
+    for lag in (1, 2, 3):
+        df[f"lag_{lag}"] = prices.shift(lag)
+
+    df["month"] = df["Price Date"].dt.month
+    df["day_of_week"] = df["Price Date"].dt.dayofweek
+
+    codes = np.array([
+        encodings.codes(crop, mandi)
+        for crop, mandi in zip(df["Commodity"], df["Market Name"])
+    ])
+    for i, column in enumerate(CODE_FEATURES):
+        df[column] = codes[:, i]
+
+    return df.dropna(subset=["lag_1", "lag_2", "lag_3"])
+
+
+def fit_global_forest(features, n_jobs=-1):
+
+    model = RandomForestRegressor(
+        n_estimators=N_ESTIMATORS,
+        min_samples_leaf=MIN_SAMPLES_LEAF,
+        max_samples=MAX_SAMPLES,
+        random_state=42,
+        n_jobs=n_jobs
+    )
+
+    model.fit(features[FEATURES], features["Modal_Price"])
+
+    return model
+
+
+class GlobalSeriesModel:
+    """
+    The global forest seen as a per-mandi model: predict takes the usual
+    five series features and appends this series' codes.
+    """
+
+    def __init__(self, forest, codes):
+        self.forest = forest
+        self.codes = np.asarray(codes, dtype=np.float64)
+        self.n_features_in_ = FEATURE_COUNT
+
+    @property
+    def n_trees(self):
+        return self.forest.n_trees
+
+    def _with_codes(self, X):
+        X = np.asarray(X, dtype=np.float64).reshape(-1, FEATURE_COUNT)
+        return np.hstack([X, np.broadcast_to(self.codes, (len(X), len(self.codes)))])
+
+    def predict(self, X):
+        return self.forest.predict(self._with_codes(X))
+
+    def tree_predictions(self, X):
+        return self.forest.tree_predictions(self._with_codes(X))
+
+
+class GlobalPriceModel:
+
+    def __init__(self, forest, encodings):
+        self.forest = forest
+        self.encodings = encodings
+
+    @classmethod
+    def load(cls, model_path=None, encodings_path=None):
+
+        with open(encodings_path or GLOBAL_ENCODINGS_PATH, "r") as f:
+            encodings = SeriesEncodings.from_json(json.load(f))
+
+        return cls(load_compiled(model_path or GLOBAL_MODEL_PATH), encodings)
+
+    @property
+    def nbytes(self):
+        return self.forest.nbytes
+
+    def for_series(self, crop, mandi):
+        return GlobalSeriesModel(self.forest, self.encodings.codes(crop, mandi))
+
+
+def train_global_model(model_dir=None):
+
+    start = time.perf_counter()
+    model_dir = model_dir or GLOBAL_MODEL_DIR
+
+    df = load_price_history()
+    sizes = df.groupby(["Commodity", "Market Name"])["Modal_Price"].transform("size")
+    df = df[sizes >= MIN_ROWS]
+
+    encodings = SeriesEncodings.from_frame(df, get_warehouse().market_states())
+    features = build_global_features(df, encodings)
+
+    model = fit_global_forest(features)
+
+    os.makedirs(model_dir, exist_ok=True)
+    model_path = os.path.join(model_dir, os.path.basename(GLOBAL_MODEL_PATH))
+    encodings_path = os.path.join(model_dir, os.path.basename(GLOBAL_ENCODINGS_PATH))
+
+    # Both files are written in full before being moved into place, since
+    # a running server reloads them as soon as they change
+    joblib.dump(model, model_path + ".tmp")
+
+    with open(encodings_path + ".tmp", "w") as f:
+        json.dump({
+            **encodings.to_json(),
+            "trained_at": datetime.now().isoformat(timespec="seconds"),
+            "rows": len(features)
+        }, f)
+
+    os.replace(encodings_path + ".tmp", encodings_path)
+    os.replace(model_path + ".tmp", model_path)
+
+    elapsed = time.perf_counter() - start
+
+    print(f" Trained global model on {len(features)} rows from "
+          f"{len(encodings.crops)} crops x {len(encodings.mandis)} mandis in {elapsed:.1f}s")
+
+    return model
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the global price model")
+    parser.add_argument("--out", default=None, help="output directory (default: models/global)")
+    args = parser.parse_args()
+
+    train_global_model(args.out)
@@ -1,13 +1,186 @@
 import requests
 import os
+import sqlite3
+import threading
+import time
+import pandas as pd
 from dotenv import load_dotenv
 
 load_dotenv()
 
 API_KEY = os.getenv("OPENWEATHER_API_KEY")
 
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+CACHE_PATH = os.path.join(BASE_DIR, "data", "cache", "zip_coordinates.sqlite")
+# Postal table: pincode, latitude, longitude (one row per PIN code). It is
+# not shipped with the repository (e.g. export the India Post PIN code
+# directory to this path); without it every first lookup of a PIN code
+# goes to the OpenWeather geocoder.
+POSTAL_TABLE_PATH = os.getenv(
+    "PINCODE_TABLE_PATH",
+    os.path.join(BASE_DIR, "data", "raw", "pincode_coordinates.csv")
+)
 
-def get_coordinates_from_zip(zip_code, country_code="IN"):
+REQUEST_TIMEOUT = 10
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+
+    return _session
+
+
+class ZipCoordinateCache:
+    """
+    Persistent (country_code, zip_code) -> (lat, lon) store in SQLite with
+    an in-process dict in front. PIN codes don't move, so entries never
+    expire.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self.path = path
+        self._memory = {}
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS zip_coordinates (
+                country_code TEXT NOT NULL,
+                zip_code TEXT NOT NULL,
+                lat REAL NOT NULL,
+                lon REAL NOT NULL,
+                source TEXT,
+                updated_at REAL,
+                PRIMARY KEY (country_code, zip_code)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def key(zip_code, country_code):
+        return country_code.strip().upper(), str(zip_code).strip()
+
+    def get(self, zip_code, country_code="IN"):
+
+        key = self.key(zip_code, country_code)
+        cached = self._memory.get(key)
+
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT lat, lon FROM zip_coordinates WHERE country_code = ? AND zip_code = ?",
+                key
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        self._memory[key] = row
+        return row
+
+    def put(self, zip_code, country_code, lat, lon, source="openweather"):
+
+        key = self.key(zip_code, country_code)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO zip_coordinates VALUES (?, ?, ?, ?, ?, ?)",
+                (*key, float(lat), float(lon), source, time.time())
+            )
+            self._conn.commit()
+
+        self._memory[key] = (float(lat), float(lon))
+
+    def preload_postal_table(self, path=POSTAL_TABLE_PATH, country_code="IN"):
+        """
+        Bulk-loads a postal table once; reloaded only when the file changes.
+        Entries already written through from the API are kept.
+        """
+
+        if not os.path.exists(path):
+            print(f" Warning: postal table {path} not found; "
+                  f"ZIP codes will be geocoded through the OpenWeather API")
+            return 0
+
+        stamp = f"{os.path.getsize(path)}:{os.path.getmtime(path)}"
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE key = ?", ("postal_table:" + path,)
+            ).fetchone()
+
+        if row is not None and row[0] == stamp:
+            return 0
+
+        df = pd.read_csv(path, dtype={"pincode": str})
+        df = df.dropna(subset=["pincode", "latitude", "longitude"])
+        df = df.drop_duplicates(subset=["pincode"], keep="first")
+
+        now = time.time()
+        country_code = country_code.strip().upper()
+
+        rows = [
+            (country_code, pincode.strip(), float(lat), float(lon), "postal_table", now)
+            for pincode, lat, lon in zip(df["pincode"], df["latitude"], df["longitude"])
+        ]
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO zip_coordinates VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                ("postal_table:" + path, stamp)
+            )
+            self._conn.commit()
+
+        return len(rows)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_zip_cache():
+
+    global _cache
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                cache = ZipCoordinateCache()
+                cache.preload_postal_table()
+                _cache = cache
+
+    return _cache
+
+
+def fetch_coordinates_from_api(zip_code, country_code="IN"):
 
     url = "http://api.openweathermap.org/geo/1.0/zip"
 
@@ -16,7 +189,7 @@ def get_coordinates_from_zip(zip_code, country_code="IN"):
         "appid": API_KEY
     }
 
-    response = requests.get(url, params=params)
+    response = get_session().get(url, params=params, timeout=REQUEST_TIMEOUT)
 
     if response.status_code != 200:
         raise ValueError("Invalid ZIP or API error")
@@ -24,3 +197,21 @@ def get_coordinates_from_zip(zip_code, country_code="IN"):
     data = response.json()
 
     return data["lat"], data["lon"]
+
+
+def get_coordinates_from_zip(zip_code, country_code="IN"):
+    """
+    Served from the local store; the OpenWeather API is only called on a
+    miss and its answer is written through for next time.
+    """
+
+    cache = get_zip_cache()
+
+    cached = cache.get(zip_code, country_code)
+    if cached is not None:
+        return cached
+
+    lat, lon = fetch_coordinates_from_api(zip_code, country_code)
+    cache.put(zip_code, country_code, lat, lon)
+
+    return lat, lon
@@ -1,39 +1,165 @@
 import pandas as pd
+import numpy as np
 import os
-import math
+import threading
+
+from sklearn.neighbors import BallTree
+
+from .model_registry import get_registry
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 COORD_PATH = os.path.join(BASE_DIR, "data", "raw", "mandi_coordinates.csv")
 
+EARTH_RADIUS_KM = 6371
+
+
+class MandiSpatialIndex:
+    """
+    Ball tree over mandi coordinates (haversine metric on radians), built
+    once. Queries take lat/lon in degrees and return distances in km.
+    """
+
+    def __init__(self, names, latitudes, longitudes):
+
+        self.names = np.asarray(names, dtype=object)
+        self.coords = np.radians(np.column_stack([latitudes, longitudes]).astype(float))
+        self.tree = BallTree(self.coords, metric="haversine") if len(self.names) else None
+
+        self._crop_indexes = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_csv(cls, path=COORD_PATH):
+
+        df = pd.read_csv(path)
+        df = df.dropna(subset=["Latitude", "Longitude"])
+
+        # Same-named mandis in different states are different places; only
+        # repeats of the same mandi at the same spot are dropped
+        key = [column for column in ("Market Name", "State", "Latitude", "Longitude") if column in df.columns]
+        df = df.drop_duplicates(subset=key)
+
+        return cls(df["Market Name"], df["Latitude"], df["Longitude"])
+
+    def __len__(self):
+        return len(self.names)
+
+    def for_crop(self, crop):
+        """
+        Sub-index of mandis that have a trained price model for crop.
+        """
+
+        key = crop.lower()
+        registry = get_registry()
+        registry.refresh_if_changed()
+
+        # Rebuilt when the registry re-indexes, so newly trained models count
+        cached = self._crop_indexes.get(key)
+        if cached is not None and cached[0] == registry.index_version:
+            return cached[1]
+
+        version = registry.index_version
+        mask = np.array([registry.key(crop, name) in registry.index for name in self.names], dtype=bool)
+        index = MandiSpatialIndex(
+            self.names[mask],
+            np.degrees(self.coords[mask, 0]),
+            np.degrees(self.coords[mask, 1])
+        )
+        with self._lock:
+            self._crop_indexes[key] = (version, index)
+
+        return index
+
+    def _select(self, crop):
+        return self.for_crop(crop) if crop else self
+
+    @staticmethod
+    def _query_points(lats, lons):
+        return np.radians(np.column_stack([np.atleast_1d(lats), np.atleast_1d(lons)]).astype(float))
+
+    def k_nearest(self, lat, lon, k=5, crop=None):
+
+        index = self._select(crop)
+
+        if not len(index):
+            return []
+
+        k = min(k, len(index))
+        distances, positions = index.tree.query(self._query_points(lat, lon), k=k)
+
+        return [
+            {"mandi": index.names[p], "distance_km": round(float(d * EARTH_RADIUS_KM), 2)}
+            for d, p in zip(distances[0], positions[0])
+        ]
+
+    def nearest(self, lat, lon, crop=None):
+
+        result = self.k_nearest(lat, lon, k=1, crop=crop)
+
+        return result[0] if result else None
+
+    def within_radius(self, lat, lon, radius_km, crop=None):
+
+        index = self._select(crop)
+
+        if not len(index):
+            return []
+
+        positions, distances = index.tree.query_radius(
+            self._query_points(lat, lon),
+            r=radius_km / EARTH_RADIUS_KM,
+            return_distance=True,
+            sort_results=True
+        )
+
+        return [
+            {"mandi": index.names[p], "distance_km": round(float(d * EARTH_RADIUS_KM), 2)}
+            for d, p in zip(distances[0], positions[0])
+        ]
+
+    def nearest_batch(self, lats, lons, crop=None):
+        """
+        Nearest mandi for many points at once; returns (names, distances_km).
+        """
+
+        index = self._select(crop)
+        points = self._query_points(lats, lons)
+
+        if not len(index):
+            return np.full(len(points), None, dtype=object), np.full(len(points), np.nan)
+
+        distances, positions = index.tree.query(points, k=1)
+
+        return index.names[positions[:, 0]], distances[:, 0] * EARTH_RADIUS_KM
+
 
-def haversine(lat1, lon1, lat2, lon2):
+_index = None
+_index_lock = threading.Lock()
 
-    R = 6371
-    dlat = math.radians(lat2 - lat1)
-    dlon = math.radians(lon2 - lon1)
 
-    a = (math.sin(dlat/2) ** 2 +
-         math.cos(math.radians(lat1)) *
-         math.cos(math.radians(lat2)) *
-         math.sin(dlon/2) ** 2)
+def get_mandi_index():
 
-    return 2 * R * math.atan2(math.sqrt(a), math.sqrt(1-a))
+    global _index
 
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = MandiSpatialIndex.from_csv()
 
-def get_nearest_mandi(user_lat, user_lon):
+    return _index
 
-    df = pd.read_csv(COORD_PATH)
 
-    nearest = None
-    min_dist = float("inf")
+def get_nearest_mandi(user_lat, user_lon, crop=None):
+    """
+    Nearest mandi to the user. With crop, only mandis that have a trained
+    model for that crop are considered, falling back to all mandis.
+    """
 
-    for _, row in df.iterrows():
+    index = get_mandi_index()
 
-        dist = haversine(user_lat, user_lon,
-                         row["Latitude"], row["Longitude"])
+    nearest = index.nearest(user_lat, user_lon, crop=crop) if crop else None
 
-        if dist < min_dist:
-            min_dist = dist
-            nearest = row["Market Name"]
+    if nearest is None:
+        nearest = index.nearest(user_lat, user_lon)
 
-    return nearest
+    return nearest["mandi"] if nearest else None
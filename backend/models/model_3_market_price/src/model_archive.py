@@ -0,0 +1,255 @@
+"""
+Packed archive of every per-mandi price model.
+
+Layout (little endian):
+    header   MAGIC, format version, index offset/length, index CRC32,
+             SHA-256 of everything after the header
+    arrays   flat node tables of each compiled forest, 64-byte aligned
+    index    JSON: archive metadata plus, per model, the offset, dtype and
+             shape of each array and a CRC32 of its bytes
+
+At serve time the file is memory-mapped read-only, so every uvicorn worker
+shares the same physical pages and a model is just a set of NumPy views.
+
+Build / verify from the repository root:
+    python -m backend.models.model_3_market_price.src.model_archive build
+    python -m backend.models.model_3_market_price.src.model_archive verify
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from backend.models.common.forest_runtime import CompiledForest, load_compiled
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+MODEL_DIR = os.path.join(BASE_DIR, "models")
+ARCHIVE_PATH = os.path.join(MODEL_DIR, "market_models.bin")
+
+MAGIC = b"FPMKTARC"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIIQQII32s")
+ALIGNMENT = 64
+
+ARRAY_FIELDS = (
+    "feature",
+    "threshold",
+    "children_left",
+    "children_right",
+    "value",
+    "roots",
+    "is_leaf"
+)
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def _pad(handle):
+    remainder = handle.tell() % ALIGNMENT
+    if remainder:
+        handle.write(b"\0" * (ALIGNMENT - remainder))
+
+
+def build_archive(model_dir=MODEL_DIR, path=ARCHIVE_PATH):
+    """
+    Compiles every .pkl in model_dir and packs it into one archive file.
+    The archive is written next to its final path and moved into place
+    atomically, so running workers never see a half-written file.
+    """
+
+    start = time.perf_counter()
+    file_names = sorted(f for f in os.listdir(model_dir) if f.endswith(".pkl"))
+
+    models = {}
+    tmp_path = path + ".tmp"
+
+    with open(tmp_path, "wb") as handle:
+
+        handle.write(b"\0" * HEADER.size)
+        _pad(handle)
+
+        for file_name in file_names:
+            forest = load_compiled(os.path.join(model_dir, file_name))
+
+            if forest.is_classifier:
+                raise ArchiveError(f"Only regressors can be archived: {file_name}")
+
+            arrays = {}
+            crc = 0
+
+            for field in ARRAY_FIELDS:
+                array = np.ascontiguousarray(getattr(forest, field))
+                _pad(handle)
+                arrays[field] = {
+                    "offset": handle.tell(),
+                    "dtype": array.dtype.str,
+                    "shape": list(array.shape)
+                }
+                data = array.tobytes()
+                crc = zlib.crc32(data, crc)
+                handle.write(data)
+
+            models[file_name.lower()] = {
+                "file": file_name,
+                "max_depth": forest.max_depth,
+                "n_features_in": forest.n_features_in_,
+                "feature_names_in": (
+                    list(forest.feature_names_in_)
+                    if forest.feature_names_in_ is not None else None
+                ),
+                "source_mtime": os.path.getmtime(os.path.join(model_dir, file_name)),
+                "crc32": crc,
+                "arrays": arrays
+            }
+
+        _pad(handle)
+        index_offset = handle.tell()
+
+        index = json.dumps({
+            "format_version": FORMAT_VERSION,
+            "built_at": time.time(),
+            "models": models
+        }).encode("utf-8")
+
+        handle.write(index)
+
+    with open(tmp_path, "r+b") as handle:
+
+        digest = hashlib.sha256()
+        handle.seek(HEADER.size)
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+
+        handle.seek(0)
+        handle.write(HEADER.pack(
+            MAGIC,
+            FORMAT_VERSION,
+            0,
+            index_offset,
+            len(index),
+            zlib.crc32(index),
+            0,
+            digest.digest()
+        ))
+
+    os.replace(tmp_path, path)
+
+    elapsed = time.perf_counter() - start
+    print(f"Packed {len(models)} models into {path} in {elapsed:.1f}s "
+          f"({os.path.getsize(path) / 1e6:.1f} MB)")
+
+    return path
+
+
+class ModelArchive:
+    """
+    Read-only, memory-mapped view of an archive built by build_archive.
+    get() returns a CompiledForest whose arrays point into the mapping,
+    so nothing is unpickled or copied.
+    """
+
+    def __init__(self, path=ARCHIVE_PATH, verify_models=True):
+
+        self.path = path
+        self.verify_models = verify_models
+
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, index_offset, index_length, index_crc, _, digest = HEADER.unpack_from(self._map, 0)
+
+        if magic != MAGIC:
+            raise ArchiveError(f"Not a market model archive: {path}")
+        if version != FORMAT_VERSION:
+            raise ArchiveError(f"Unsupported archive format version {version}")
+
+        index = self._map[index_offset:index_offset + index_length]
+
+        if zlib.crc32(index) != index_crc:
+            raise ArchiveError(f"Archive index is corrupt: {path}")
+
+        meta = json.loads(index)
+
+        self.digest = digest
+        self.built_at = meta["built_at"]
+        self.models = meta["models"]
+
+        self._verified = set()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        return key in self.models
+
+    def keys(self):
+        return self.models.keys()
+
+    def _array(self, spec):
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"])) if spec["shape"] else 1
+        return np.frombuffer(
+            self._map, dtype=dtype, count=count, offset=spec["offset"]
+        ).reshape(spec["shape"])
+
+    def get(self, key):
+
+        entry = self.models.get(key)
+
+        if entry is None:
+            raise KeyError(key)
+
+        arrays = {field: self._array(entry["arrays"][field]) for field in ARRAY_FIELDS}
+
+        if self.verify_models and key not in self._verified:
+            crc = 0
+            for field in ARRAY_FIELDS:
+                crc = zlib.crc32(arrays[field], crc)
+            if crc != entry["crc32"]:
+                raise ArchiveError(f"Checksum mismatch for model {entry['file']}")
+            with self._lock:
+                self._verified.add(key)
+
+        return CompiledForest(
+            max_depth=entry["max_depth"],
+            n_features_in_=entry["n_features_in"],
+            feature_names_in_=(
+                np.asarray(entry["feature_names_in"], dtype=object)
+                if entry["feature_names_in"] is not None else None
+            ),
+            **arrays
+        )
+
+    def verify(self):
+        """
+        Full integrity check: SHA-256 of the whole payload against the header.
+        """
+        digest = hashlib.sha256()
+        for start in range(HEADER.size, len(self._map), 1 << 20):
+            digest.update(self._map[start:start + (1 << 20)])
+        return digest.digest() == self.digest
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+if __name__ == "__main__":
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "build"
+
+    if command == "build":
+        build_archive()
+    elif command == "verify":
+        archive = ModelArchive()
+        print("OK" if archive.verify() else "CHECKSUM MISMATCH")
+    else:
+        print("usage: model_archive.py [build|verify]")
@@ -0,0 +1,382 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from backend.models.common.forest_runtime import load_compiled
+
+from .global_model import GLOBAL_ENCODINGS_PATH, GLOBAL_MODEL_PATH, GlobalPriceModel
+from .model_archive import ARCHIVE_PATH, ModelArchive
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+MODEL_DIR = os.path.join(BASE_DIR, "models")
+
+# Cache limits, overridable per deployment
+MAX_CACHED_MODELS = int(os.getenv("MARKET_MODEL_CACHE_SIZE", "256"))
+MAX_CACHED_BYTES = int(os.getenv("MARKET_MODEL_CACHE_BYTES", str(512 * 1024 * 1024)))
+
+# "crop:mandi" pairs separated by ";" that are loaded at startup and never evicted
+PINNED_MODELS = os.getenv("MARKET_MODEL_PINNED", "")
+
+# Model used when a request doesn't choose one:
+#   mandi  - the per-mandi forest (error if the pair has none)
+#   global - the single global model
+#   auto   - per-mandi when trained, global otherwise
+MODEL_TYPES = ("mandi", "global", "auto")
+DEFAULT_MODEL_TYPE = os.getenv("MARKET_MODEL_TYPE", "mandi")
+
+
+def model_file_name(crop, mandi):
+    """
+    File name train_model.py writes for a (crop, mandi) model.
+    """
+    model_name = f"{crop}_{mandi}.pkl"
+    return model_name.replace(" ", "_").replace("/", "_")
+
+
+def parse_pinned(spec):
+    pairs = []
+    for entry in spec.split(";"):
+        if ":" in entry:
+            crop, mandi = entry.split(":", 1)
+            pairs.append((crop.strip(), mandi.strip()))
+    return pairs
+
+
+class MarketModelRegistry:
+    """
+    Resolves (crop, mandi) to a compiled per-mandi price model.
+
+    The model directory is indexed up front and re-indexed whenever its
+    mtime changes (a model trained, synced or deleted since); models are
+    loaded lazily into an LRU cache bounded by model count and by compiled size in bytes. Pinned
+    models live outside the LRU and are never evicted.
+
+    When a packed archive (see model_archive.py) exists, models are served
+    from its memory map and only models missing from it are unpickled.
+
+    The optional global model (see global_model.py) is loaded on first use
+    and kept outside the LRU.
+
+    Every loaded model remembers the version (file mtime) it was loaded
+    at, and is reloaded when a retrain changes it.
+    """
+
+    def __init__(self,
+                 model_dir=MODEL_DIR,
+                 max_models=MAX_CACHED_MODELS,
+                 max_bytes=MAX_CACHED_BYTES,
+                 archive_path=ARCHIVE_PATH,
+                 global_model_path=GLOBAL_MODEL_PATH,
+                 global_encodings_path=GLOBAL_ENCODINGS_PATH):
+
+        self.model_dir = model_dir
+        self.global_model_path = global_model_path
+        self.global_encodings_path = global_encodings_path
+        self._global_model = None  # (model, version)
+        self.archive = ModelArchive(archive_path) if archive_path and os.path.exists(archive_path) else None
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # key -> (model, nbytes, version)
+        self._cached_bytes = 0
+        self._pinned = {}  # key -> (model, version)
+
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+        self.index_version = 0
+        self._indexed_mtime = None
+        self.refresh_index()
+
+    def _dir_mtime(self):
+        try:
+            return os.stat(self.model_dir).st_mtime_ns
+        except OSError:
+            return None
+
+    def refresh_index(self):
+
+        # Read before listing, so a model written during the scan still
+        # changes the directory mtime afterwards
+        mtime = self._dir_mtime()
+        index = {}
+
+        if os.path.isdir(self.model_dir):
+            for file_name in os.listdir(self.model_dir):
+                if file_name.endswith(".pkl"):
+                    index[file_name.lower()] = os.path.join(self.model_dir, file_name)
+
+        if self.archive is not None:
+            for key, entry in self.archive.models.items():
+                index.setdefault(key, os.path.join(self.model_dir, entry["file"]))
+
+        with self._lock:
+            self.index = index
+            self._indexed_mtime = mtime
+            self.index_version += 1
+
+    def refresh_if_changed(self):
+        """
+        Re-indexes when files were added to, removed from or renamed into
+        model_dir since the last scan. Returns whether it did.
+        """
+
+        if self._dir_mtime() == self._indexed_mtime:
+            return False
+
+        self.refresh_index()
+        return True
+
+    @staticmethod
+    def key(crop, mandi):
+        return model_file_name(crop, mandi).lower()
+
+    def has_model(self, crop, mandi):
+
+        key = self.key(crop, mandi)
+
+        return key in self.index or (self.refresh_if_changed() and key in self.index)
+
+    def model_path(self, crop, mandi):
+
+        key = self.key(crop, mandi)
+        path = self.index.get(key)
+
+        if path is None and self.refresh_if_changed():
+            path = self.index.get(key)
+
+        if path is None:
+            raise ValueError(f"Model not found for: {crop} - {mandi}")
+
+        return path
+
+    def has_global_model(self):
+        return bool(self.global_model_path) and os.path.exists(self.global_model_path)
+
+    def resolve_model_type(self, crop, mandi, model_type=None):
+
+        model_type = model_type or DEFAULT_MODEL_TYPE
+
+        if model_type not in MODEL_TYPES:
+            raise ValueError(f"Unknown model type: {model_type} (expected one of {', '.join(MODEL_TYPES)})")
+
+        if model_type == "auto":
+            return "mandi" if self.has_model(crop, mandi) or not self.has_global_model() else "global"
+
+        return model_type
+
+    def global_model_version(self):
+        """
+        Mtimes of the global model and its encodings; retraining rewrites
+        both, but either one changing means a reload.
+        """
+
+        encodings_mtime = (
+            os.path.getmtime(self.global_encodings_path)
+            if os.path.exists(self.global_encodings_path) else None
+        )
+
+        return os.path.getmtime(self.global_model_path), encodings_mtime
+
+    def global_model(self):
+
+        if not self.has_global_model():
+            raise ValueError("Global price model has not been trained")
+
+        version = self.global_model_version()
+        loaded = self._global_model
+
+        if loaded is not None and loaded[1] == version:
+            return loaded[0]
+
+        start = time.perf_counter()
+        model = GlobalPriceModel.load(self.global_model_path, self.global_encodings_path)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self._global_model = (model, version)
+            self.loads += 1
+            self.load_seconds += elapsed
+
+        return model
+
+    def _mandi_version(self, crop, mandi):
+        """
+        (key, path, version) of the per-mandi model; the version is the
+        pickle's mtime, or the archived copy's source mtime when the pickle
+        is gone.
+        """
+
+        key = self.key(crop, mandi)
+        path = self.model_path(crop, mandi)
+
+        try:
+            return key, path, os.path.getmtime(path)
+        except OSError:
+            pass
+
+        if self.archive is not None and key in self.archive:
+            return key, path, self.archive.models[key]["source_mtime"]
+
+        # Deleted since it was indexed
+        self.refresh_index()
+        raise ValueError(f"Model not found for: {crop} - {mandi}")
+
+    def model_version(self, crop, mandi, model_type=None):
+        """
+        Changes whenever the model serving (crop, mandi) is retrained.
+        """
+
+        if self.resolve_model_type(crop, mandi, model_type) == "global":
+            return self.global_model_version()
+
+        return self._mandi_version(crop, mandi)[2]
+
+    def _archived_is_current(self, key, path):
+        """
+        The archive copy is used unless the pickle was retrained after the
+        archive was built.
+        """
+        if self.archive is None or key not in self.archive:
+            return False
+        if not os.path.exists(path):
+            return True
+        return os.path.getmtime(path) <= self.archive.models[key]["source_mtime"]
+
+    def _load(self, key, path):
+
+        start = time.perf_counter()
+        if self._archived_is_current(key, path):
+            model = self.archive.get(key)
+        else:
+            model = load_compiled(path)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.loads += 1
+            self.load_seconds += elapsed
+
+        return model
+
+    def _evict(self):
+
+        while self._cache and (
+            len(self._cache) > self.max_models or self._cached_bytes > self.max_bytes
+        ):
+            _, (_, nbytes, _) = self._cache.popitem(last=False)
+            self._cached_bytes -= nbytes
+            self.evictions += 1
+
+    def get(self, crop, mandi, model_type=None):
+
+        if self.resolve_model_type(crop, mandi, model_type) == "global":
+            model = self.global_model()
+            with self._lock:
+                self.hits += 1
+            return model.for_series(crop, mandi)
+
+        key, path, version = self._mandi_version(crop, mandi)
+
+        with self._lock:
+
+            pinned = self._pinned.get(key)
+            if pinned is not None and pinned[1] == version:
+                self.hits += 1
+                return pinned[0]
+
+            cached = self._cache.get(key)
+            if cached is not None and cached[2] == version:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached[0]
+
+            self.misses += 1
+
+        model = self._load(key, path)
+
+        with self._lock:
+
+            if key in self._pinned:
+                self._pinned[key] = (model, version)
+                return model
+
+            stale = self._cache.pop(key, None)
+            if stale is not None:
+                self._cached_bytes -= stale[1]
+
+            nbytes = model.nbytes
+            self._cache[key] = (model, nbytes, version)
+            self._cached_bytes += nbytes
+            self._evict()
+
+            return model
+
+    def pin(self, crop, mandi):
+
+        key = self.key(crop, mandi)
+
+        with self._lock:
+            cached = self._cache.pop(key, None)
+            if cached is not None:
+                self._cached_bytes -= cached[1]
+                self._pinned[key] = (cached[0], cached[2])
+
+        if key not in self._pinned:
+            key, path, version = self._mandi_version(crop, mandi)
+            model = self._load(key, path)
+            with self._lock:
+                self._pinned.setdefault(key, (model, version))
+
+    def unpin(self, crop, mandi):
+
+        with self._lock:
+            self._pinned.pop(self.key(crop, mandi), None)
+
+    def stats(self):
+
+        with self._lock:
+            lookups = self.hits + self.misses
+
+            return {
+                "indexed_models": len(self.index),
+                "cached_models": len(self._cache),
+                "cached_bytes": self._cached_bytes,
+                "pinned_models": len(self._pinned),
+                "global_model_loaded": self._global_model is not None,
+                "default_model_type": DEFAULT_MODEL_TYPE,
+                "archive": self.archive.path if self.archive is not None else None,
+                "max_models": self.max_models,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "total_load_ms": round(self.load_seconds * 1000, 2),
+                "avg_load_ms": round(self.load_seconds * 1000 / self.loads, 2) if self.loads else 0.0
+            }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+
+    global _registry
+
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                registry = MarketModelRegistry()
+                for crop, mandi in parse_pinned(PINNED_MODELS):
+                    if registry.has_model(crop, mandi):
+                        registry.pin(crop, mandi)
+                _registry = registry
+
+    return _registry
@@ -0,0 +1,246 @@
+import argparse
+import os
+import re
+import threading
+import time
+from difflib import SequenceMatcher
+
+import numpy as np
+
+from .model_registry import get_registry, model_file_name
+from .price_history import get_price_history_store
+
+# Fuzzy matches scoring below these are treated as unknown names. Mandi
+# names are much stricter: many real towns differ by a letter or two
+# (Rampur / Raipur, Sirsa / Sirsi) and must not stand in for each other.
+MIN_SCORE = float(os.getenv("NAME_MATCH_MIN_SCORE", "0.8"))
+MANDI_MIN_SCORE = float(os.getenv("NAME_MATCH_MANDI_MIN_SCORE", "0.9"))
+
+# Rejected matches at least this close are suggested in the error
+SUGGEST_SCORE = 0.6
+
+# Trigram candidates re-scored by edit similarity
+SHORTLIST = 5
+
+# Resolved spellings remembered per resolver, so repeated misspellings
+# skip the fuzzy search
+MAX_REMEMBERED = 4096
+
+
+def match_key(name):
+    """
+    Case, punctuation and separator insensitive form of a name, so
+    "Dharmapuri(Uzhavar_Sandhai_)" and "dharmapuri uzhavar sandhai" agree.
+    """
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", str(name).lower()).split())
+
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """
+    Exact lookup on match keys. Otherwise the names sharing the most
+    trigrams (Dice coefficient, through an inverted index) are shortlisted
+    and the closest by edit similarity wins; that also catches swapped
+    letters in short names, which break most of their trigrams.
+    """
+
+    def __init__(self, canonical):
+        """
+        canonical: {match_key: canonical name}.
+        """
+
+        self.exact = dict(canonical)
+        self.keys = sorted(canonical)
+        self.names = [canonical[key] for key in self.keys]
+
+        postings = {}
+        gram_counts = []
+        for i, key in enumerate(self.keys):
+            grams = trigrams(key)
+            gram_counts.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self.gram_counts = np.array(gram_counts, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.names)
+
+    def match(self, name):
+        """
+        (canonical name, score in [0, 1]); (None, 0.0) when nothing shares
+        a trigram with name.
+        """
+
+        key = match_key(name)
+
+        exact = self.exact.get(key)
+        if exact is not None:
+            return exact, 1.0
+
+        grams = trigrams(key)
+        hits = [self.postings[gram] for gram in grams if gram in self.postings]
+
+        if not hits:
+            return None, 0.0
+
+        shared = np.bincount(np.concatenate(hits), minlength=len(self.keys))
+        dice = 2 * shared / (len(grams) + self.gram_counts)
+
+        shortlist = np.argsort(-dice, kind="stable")[:SHORTLIST]
+
+        best, score = None, 0.0
+        for i in shortlist:
+            if shared[i] == 0:
+                break
+            candidate = SequenceMatcher(None, key, self.keys[i]).ratio()
+            if candidate > score:
+                best, score = i, candidate
+
+        return self.names[best], round(score, 3)
+
+
+def suggestion(name, score):
+    return f" (did you mean {name}?)" if name is not None and score >= SUGGEST_SCORE else ""
+
+
+class NameResolver:
+    """
+    Maps user-supplied crop and mandi names to the canonical (crop, mandi)
+    of a series in the price history or a trained model. The crop is
+    matched first and the mandi only among that crop's mandis.
+    """
+
+    def __init__(self, pairs, sources=None):
+
+        crops = {}
+        mandis = {}
+
+        # Earlier pairs win when two names share a match key
+        for crop, mandi in pairs:
+            crop = crops.setdefault(match_key(crop), crop)
+            mandis.setdefault(crop, {}).setdefault(match_key(mandi), mandi)
+
+        self.crops = NameIndex(crops)
+        self.mandis = {crop: NameIndex(names) for crop, names in mandis.items()}
+        self.sources = sources
+        self._remembered = {}
+
+    @classmethod
+    def from_sources(cls, store, registry):
+        """
+        Pairs from the price history (with their original spelling) and
+        from the model index, whose file names encode the pair.
+        """
+
+        pairs = []
+
+        for key in store.keys():
+            series = store.get_series(*key)
+            pairs.append((series.commodity, series.market))
+
+        # "<crop>_<mandi>.pkl": match the longest known crop prefix
+        prefixes = sorted(
+            {model_file_name(crop, "")[:-len(".pkl")].lower(): crop for crop, _ in pairs}.items(),
+            key=lambda item: -len(item[0])
+        )
+
+        for path in registry.index.values():
+            stem = os.path.basename(path)[:-len(".pkl")]
+
+            for prefix, crop in prefixes:
+                if stem.lower().startswith(prefix):
+                    pairs.append((crop, stem[len(prefix):]))
+                    break
+            else:
+                if "_" in stem:
+                    pairs.append(tuple(stem.split("_", 1)))
+
+        return cls(pairs, sources=(len(store), registry.index_version))
+
+    def resolve(self, crop, mandi, min_score=MIN_SCORE, mandi_min_score=MANDI_MIN_SCORE):
+        """
+        (canonical crop, canonical mandi, score); the score is the weaker
+        of the two matches, 1.0 when both names match exactly up to case
+        and punctuation. Raises ValueError when either name is unknown,
+        naming the closest known name when there is a plausible one.
+        """
+
+        remembered = self._remembered.get((crop, mandi))
+        if remembered is not None:
+            return remembered
+
+        canonical_crop, crop_score = self.crops.match(crop)
+
+        if canonical_crop is None or crop_score < min_score:
+            raise ValueError(f"Unknown crop: {crop}" + suggestion(canonical_crop, crop_score))
+
+        canonical_mandi, mandi_score = self.mandis[canonical_crop].match(mandi)
+
+        if canonical_mandi is None or mandi_score < mandi_min_score:
+            raise ValueError(
+                f"No {canonical_crop} prices or model for mandi: {mandi}"
+                + suggestion(canonical_mandi, mandi_score)
+            )
+
+        result = (canonical_crop, canonical_mandi, min(crop_score, mandi_score))
+
+        if len(self._remembered) >= MAX_REMEMBERED:
+            self._remembered.clear()
+        self._remembered[(crop, mandi)] = result
+
+        return result
+
+    def stats(self):
+        return {
+            "crops": len(self.crops),
+            "mandis": sum(len(index) for index in self.mandis.values()),
+            "remembered": len(self._remembered),
+            "min_score": MIN_SCORE,
+            "mandi_min_score": MANDI_MIN_SCORE
+        }
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_name_resolver():
+    """
+    Shared resolver, rebuilt when the price history gains a series or the
+    model directory changes (e.g. a model trained after startup).
+    """
+
+    global _resolver
+
+    store = get_price_history_store()
+    registry = get_registry()
+    registry.refresh_if_changed()
+    sources = (len(store), registry.index_version)
+
+    if _resolver is None or _resolver.sources != sources:
+        with _resolver_lock:
+            if _resolver is None or _resolver.sources != sources:
+                _resolver = NameResolver.from_sources(store, registry)
+
+    return _resolver
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resolve a crop and mandi name to a known series")
+    parser.add_argument("crop")
+    parser.add_argument("mandi")
+    args = parser.parse_args()
+
+    resolver = get_name_resolver()
+
+    start = time.perf_counter()
+    result = resolver.resolve(args.crop, args.mandi)
+    elapsed = time.perf_counter() - start
+
+    print(f" {result[0]} - {result[1]} (score {result[2]}) in {elapsed * 1e6:.0f} us")
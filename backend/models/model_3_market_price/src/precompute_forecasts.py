@@ -0,0 +1,163 @@
+"""
+Offline job that forecasts every (crop, mandi) with a trained model and
+writes the results to the materialized forecast table (forecast_table.py),
+which predict_next_days serves while it is fresh.
+
+Only the longest horizon is computed: recursive forecasts for 7 and 14
+days are prefixes of the 30-day one. Series are split into chunks that
+run in parallel processes; inside a chunk the models are stacked into
+ForestBundles so each forecast step is one traversal for all series.
+
+Run nightly from the repository root:
+    python -m backend.models.model_3_market_price.src.precompute_forecasts [--days 30] [--workers N]
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from backend.models.common.forest_runtime import ForestBundle
+from backend.models.model_3_market_price.src.forecast_table import ForecastTable
+from backend.models.model_3_market_price.src.forecaster import LAG_COUNT, QUANTILES, forecast_recursive_batch
+from backend.models.model_3_market_price.src.model_registry import get_registry
+from backend.models.model_3_market_price.src.predict import forecast_rows
+from backend.models.model_3_market_price.src.price_history import get_price_history_store, normalize_name
+
+MAX_HORIZON = 30
+CHUNK_SIZE = 64
+
+
+def collect_jobs(registry, store):
+    """
+    One job per price series that has a trained model and enough history.
+    """
+
+    jobs = []
+    without_history = 0
+
+    for crop, mandi in store.keys():
+        series = store.get_series(crop, mandi)
+
+        if not registry.has_model(series.commodity, series.market):
+            continue
+        if len(series) < LAG_COUNT:
+            without_history += 1
+            continue
+
+        _, recent_prices = series.tail(LAG_COUNT)
+
+        jobs.append({
+            "crop": series.commodity,
+            "mandi": series.market,
+            "recent_prices": recent_prices.copy(),
+            "last_date": series.last_date,
+            "data_version": series.data_version,
+            "model_version": registry.model_version(series.commodity, series.market, "mandi")
+        })
+
+    return jobs, without_history
+
+
+def forecast_chunk(jobs, days):
+    """
+    Forecasts a chunk of series; runs inside a worker process. Returns the
+    forecast rows of each job (in order) and the seconds spent.
+    """
+
+    start = time.perf_counter()
+    registry = get_registry()
+
+    models = [registry.get(job["crop"], job["mandi"], "mandi") for job in jobs]
+    results = [None] * len(jobs)
+
+    # Forests can only share a traversal when their shapes agree
+    groups = {}
+    for i, model in enumerate(models):
+        groups.setdefault((model.n_trees, model.n_features_in_), []).append(i)
+
+    for members in groups.values():
+        bundle = ForestBundle(models[i] for i in members)
+
+        dates, prices, bands = forecast_recursive_batch(
+            bundle,
+            np.arange(len(members)),
+            np.stack([jobs[i]["recent_prices"] for i in members]),
+            np.array([jobs[i]["last_date"] for i in members], dtype="datetime64[D]"),
+            days,
+            QUANTILES
+        )
+
+        for row, i in enumerate(members):
+            results[i] = forecast_rows(dates[row], prices[row], bands[row])
+
+    return results, time.perf_counter() - start
+
+
+def precompute_all(days=MAX_HORIZON, workers=None, chunk_size=CHUNK_SIZE, table=None):
+
+    run_start = time.perf_counter()
+
+    registry = get_registry()
+    store = get_price_history_store()
+    jobs, without_history = collect_jobs(registry, store)
+
+    chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+    compute_seconds = 0.0
+    entries = []
+
+    def collect(chunk, results, seconds):
+        nonlocal compute_seconds
+        compute_seconds += seconds
+        for job, rows in zip(chunk, results):
+            entries.append((
+                normalize_name(job["crop"]),
+                normalize_name(job["mandi"]),
+                job["data_version"],
+                job["model_version"],
+                rows
+            ))
+
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            collect(chunk, *forecast_chunk(chunk, days))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk, (results, seconds) in zip(chunks, pool.map(forecast_chunk, chunks, [days] * len(chunks))):
+                collect(chunk, results, seconds)
+
+    table = table or ForecastTable()
+    table.write_many(entries)
+
+    wall_clock = time.perf_counter() - run_start
+    report = {
+        "series": len(entries),
+        "without_history": without_history,
+        "horizon_days": days,
+        "chunks": len(chunks),
+        "workers": 1 if workers == 1 or len(chunks) <= 1 else (workers or os.cpu_count()),
+        "wall_clock_seconds": round(wall_clock, 2),
+        "compute_seconds": round(compute_seconds, 2),
+        "wall_ms_per_series": round(wall_clock * 1000 / len(entries), 3) if entries else 0.0,
+        "compute_ms_per_series": round(compute_seconds * 1000 / len(entries), 3) if entries else 0.0
+    }
+
+    print(f"\n Forecast {report['series']} series x {days} days in {wall_clock:.1f}s "
+          f"({report['wall_ms_per_series']} ms per series wall-clock, "
+          f"{report['compute_ms_per_series']} ms compute)")
+    if without_history:
+        print(f" Skipped (fewer than {LAG_COUNT} prices): {without_history}")
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Materialize price forecasts for every trained series")
+    parser.add_argument("--days", type=int, default=MAX_HORIZON, help="horizon to store (shorter ones are served as prefixes)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="series per bundled model call")
+    args = parser.parse_args()
+
+    precompute_all(days=args.days, workers=args.workers, chunk_size=args.chunk_size)
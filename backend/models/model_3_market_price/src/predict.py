@@ -1,77 +1,80 @@
-import joblib
-import pandas as pd
-import os
+from .forecaster import LAG_COUNT, QUANTILES, forecast_recursive
+from .model_registry import get_registry
+from .forecast_cache import forecast_cache
+from .forecast_table import get_forecast_table
+from .name_resolver import get_name_resolver
+from .price_history import get_price_history_store, normalize_name
 
 
-BASE_DIR = os.path.dirname(os.path.dirname(__file__))
-MODEL_DIR = os.path.join(BASE_DIR, "models")
-CLEAN_PATH = os.path.join(BASE_DIR, "data", "processed", "cleaned_data.csv")
-
-
-def predict_next_days(crop: str, mandi: str, days: int = 7):
+def compute_forecast(registry, series, crop, mandi, days, data_version, model_version, model_type="mandi"):
     """
-    Predict next N days price for given crop and mandi.
-    Uses recursive forecasting based on last 3 lag values.
+    Served from the materialized forecast table when it holds a fresh
+    forecast for this series and model, computed online otherwise.
     """
 
-    model_name = f"{crop}_{mandi}.pkl"
-    model_name = model_name.replace(" ", "_").replace("/", "_")
+    table = get_forecast_table() if model_type == "mandi" else None
 
-    model_path = os.path.join(MODEL_DIR, model_name)
+    if table is not None:
+        stored = table.lookup(normalize_name(crop), normalize_name(mandi), days, data_version, model_version)
+        # Rows materialized before bands were stored are recomputed
+        if stored is not None and "p10" in stored[0]:
+            return stored
 
-    if not os.path.exists(model_path):
-        raise ValueError(f"Model not found for: {crop} - {mandi}")
+    model = registry.get(crop, mandi, model_type)
 
-    model = joblib.load(model_path)
-    df = pd.read_csv(CLEAN_PATH)
+    _, recent_prices = series.tail(LAG_COUNT)
 
-    df = df[
-        (df["Commodity"].str.lower() == crop.lower()) &
-        (df["Market Name"].str.lower() == mandi.lower())
-    ]
+    dates, prices, bands = forecast_recursive(model, recent_prices, series.last_date, days, QUANTILES)
 
-    df = df.sort_values("Price Date")
+    return tuple(forecast_rows(dates, prices, bands))
 
-    if len(df) < 3:
-        raise ValueError("Not enough historical data (minimum 3 days required).")
 
-    predictions = []
-    temp_df = df.copy()
-
-    for _ in range(days):
-
-        last3 = temp_df.tail(3)
+def forecast_rows(dates, prices, bands):
+    """
+    Response rows: the point forecast plus the P10 / P50 / P90 band.
+    """
 
-        lag_1 = last3.iloc[-1]["Modal_Price"]
-        lag_2 = last3.iloc[-2]["Modal_Price"]
-        lag_3 = last3.iloc[-3]["Modal_Price"]
+    return [
+        {
+            "date": str(date),
+            "predicted_price": round(float(price), 2),
+            **{f"p{q}": round(float(value), 2) for q, value in zip(QUANTILES, band)}
+        }
+        for date, price, band in zip(dates, prices, bands)
+    ]
 
-        last_date = pd.to_datetime(last3.iloc[-1]["Price Date"])
-        next_date = last_date + pd.Timedelta(days=1)
 
-        month = next_date.month
-        day_of_week = next_date.dayofweek
+def predict_next_days(crop: str, mandi: str, days: int = 7, model_type: str = None):
+    """
+    Predict next N days price for given crop and mandi, with P10 / P50 /
+    P90 bands from the spread of the forest's trees.
+    Uses recursive forecasting based on last 3 lag values; results are
+    cached until the price series or the model changes.
+    Names are resolved to the closest known series first, so spelling
+    and punctuation differences don't fail the request.
+    model_type picks the per-mandi ("mandi") or "global" model, or "auto";
+    the registry default applies when omitted.
+    """
 
-        X = [[lag_1, lag_2, lag_3, month, day_of_week]]
+    crop, mandi, _ = get_name_resolver().resolve(crop, mandi)
 
-        next_price = float(model.predict(X)[0])
+    registry = get_registry()
+    model_type = registry.resolve_model_type(crop, mandi, model_type)
+    model_version = registry.model_version(crop, mandi, model_type)
+    series = get_price_history_store().get_series(crop, mandi)
 
-        predictions.append({
-            "date": str(next_date.date()),
-            "predicted_price": round(next_price, 2)
-        })
+    if series is None or len(series) < LAG_COUNT:
+        raise ValueError("Not enough historical data (minimum 3 days required).")
 
-        new_row = {
-            "Commodity": crop,
-            "Market Name": mandi,
-            "Price Date": next_date,
-            "Modal_Price": next_price
-        }
+    data_version = series.data_version
+    key = (normalize_name(crop), normalize_name(mandi), days, model_type, data_version, model_version)
 
-        temp_df = pd.concat([temp_df, pd.DataFrame([new_row])],
-                            ignore_index=True)
+    forecast = forecast_cache.get_or_compute(
+        key,
+        lambda: compute_forecast(registry, series, crop, mandi, days, data_version, model_version, model_type)
+    )
 
-    return predictions
+    return [dict(row) for row in forecast]
 
 if __name__ == "__main__":
     result = predict_next_days("Rice", "Guwahati", 7)
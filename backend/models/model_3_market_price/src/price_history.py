@@ -0,0 +1,240 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .price_warehouse import ensure_history_imported, get_warehouse, load_price_history, normalize_name
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+CLEAN_PATH = os.path.join(BASE_DIR, "data", "processed", "cleaned_data.csv")
+
+
+def series_key(crop, mandi):
+    return normalize_name(crop), normalize_name(mandi)
+
+
+def unique_by_date(dates, prices):
+    """
+    Date-sorted copies with one row per date, the first given for each.
+    """
+
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    prices = np.asarray(prices, dtype=np.float64)
+
+    # np.unique returns the first occurrence of each date
+    dates, first = np.unique(dates, return_index=True)
+
+    return dates, prices[first]
+
+
+class PriceSeries:
+    """
+    Date-sorted price history of one (commodity, market) pair, held in
+    contiguous arrays with spare capacity so appends are amortised O(1).
+    """
+
+    def __init__(self, commodity, market, dates, prices):
+
+        self.commodity = commodity
+        self.market = market
+        self.size = len(dates)
+        self.version = 0
+
+        capacity = max(16, self.size * 2)
+        self._dates = np.empty(capacity, dtype="datetime64[D]")
+        self._prices = np.empty(capacity, dtype=np.float64)
+        self._dates[:self.size] = dates
+        self._prices[:self.size] = prices
+
+    @property
+    def dates(self):
+        return self._dates[:self.size]
+
+    @property
+    def prices(self):
+        return self._prices[:self.size]
+
+    @property
+    def last_date(self):
+        return self._dates[self.size - 1] if self.size else None
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def data_version(self):
+        """
+        Changes whenever rows are added (appends only ever add newer dates).
+        """
+        return self.size, str(self.last_date)
+
+    def tail(self, n):
+        start = max(0, self.size - n)
+        return self._dates[start:self.size], self._prices[start:self.size]
+
+    def append(self, dates, prices):
+        """
+        Adds observations newer than the last stored date; older or
+        duplicate dates are ignored (the first of repeated new dates is
+        kept). Returns the number of rows added.
+        """
+
+        dates, prices = unique_by_date(dates, prices)
+
+        if self.size:
+            newer = dates > self.last_date
+            dates = dates[newer]
+            prices = prices[newer]
+
+        if len(dates) == 0:
+            return 0
+
+        needed = self.size + len(dates)
+
+        if needed > len(self._dates):
+            capacity = max(needed, len(self._dates) * 2)
+            self._dates = np.resize(self._dates, capacity)
+            self._prices = np.resize(self._prices, capacity)
+
+        self._dates[self.size:needed] = dates
+        self._prices[self.size:needed] = prices
+        self.size = needed
+        self.version += 1
+
+        return len(dates)
+
+
+class PriceHistoryStore:
+    """
+    All cleaned price history, loaded once and partitioned by normalised
+    (commodity, market) so a series lookup is a single dict access.
+    """
+
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+        # Last warehouse sync run already reflected in memory
+        self.synced_through = 0
+
+    @classmethod
+    def from_frame(cls, df):
+
+        store = cls()
+
+        if df.empty:
+            return store
+
+        df = df.assign(**{"Price Date": pd.to_datetime(df["Price Date"])})
+        df = df.sort_values("Price Date", kind="stable")
+
+        for (commodity, market), group in df.groupby(["Commodity", "Market Name"], sort=False):
+            key = series_key(commodity, market)
+            dates = group["Price Date"].to_numpy(dtype="datetime64[D]")
+            prices = group["Modal_Price"].to_numpy(dtype=np.float64)
+
+            if key in store._series:
+                store._series[key].append(dates, prices)
+            else:
+                store._series[key] = PriceSeries(commodity, market, dates, prices)
+
+        return store
+
+    @classmethod
+    def from_csv(cls, path=CLEAN_PATH):
+        return cls.from_frame(pd.read_csv(path))
+
+    def get_series(self, crop, mandi):
+        return self._series.get(series_key(crop, mandi))
+
+    def tail(self, crop, mandi, n):
+
+        series = self.get_series(crop, mandi)
+
+        if series is None:
+            return np.empty(0, dtype="datetime64[D]"), np.empty(0)
+
+        return series.tail(n)
+
+    def __len__(self):
+        return len(self._series)
+
+    def keys(self):
+        return list(self._series.keys())
+
+    def append(self, crop, mandi, dates, prices):
+
+        key = series_key(crop, mandi)
+
+        with self._lock:
+            series = self._series.get(key)
+
+            if series is None:
+                series = PriceSeries(crop, mandi, *unique_by_date(dates, prices))
+                series.version = 1
+                self._series[key] = series
+                return len(series)
+
+            return series.append(dates, prices)
+
+    def append_frame(self, df):
+        """
+        Incrementally adds new rows (same columns as cleaned_data.csv)
+        without reloading anything already in memory.
+        """
+
+        if df.empty:
+            return 0
+
+        df = df.assign(**{"Price Date": pd.to_datetime(df["Price Date"])})
+
+        added = 0
+        for (commodity, market), group in df.groupby(["Commodity", "Market Name"], sort=False):
+            added += self.append(
+                commodity,
+                market,
+                group["Price Date"].to_numpy(dtype="datetime64[D]"),
+                group["Modal_Price"].to_numpy(dtype=np.float64)
+            )
+
+        return added
+
+    def refresh_from_warehouse(self, warehouse=None):
+        """
+        Appends only the rows that warehouse syncs added since the last
+        load or refresh.
+        """
+
+        warehouse = warehouse or get_warehouse()
+        sync_id = warehouse.last_sync_id()
+
+        if sync_id <= self.synced_through:
+            return 0
+
+        added = self.append_frame(warehouse.read_history(after_sync_id=self.synced_through))
+        self.synced_through = sync_id
+
+        return added
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_price_history_store():
+
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                warehouse = get_warehouse()
+                # The first-use import is a sync run of its own; do it
+                # before reading the id so it isn't replayed by refreshes
+                ensure_history_imported(warehouse)
+                sync_id = warehouse.last_sync_id()
+                store = PriceHistoryStore.from_frame(load_price_history())
+                store.synced_through = sync_id
+                _store = store
+
+    return _store
@@ -2,23 +2,29 @@ from .predict import predict_next_days
 from .export.export_decision import analyze_export
 from .location_resolver import get_coordinates_from_zip
 from .mandi_selector import get_nearest_mandi
+from .model_registry import get_registry
+from .name_resolver import get_name_resolver
 
 
 def get_price_intelligence(crop,
                            mandi=None,
                            zip_code=None,
                            country_code="IN",
-                           days=7):
+                           days=7,
+                           model_type=None):
 
     if mandi is None and zip_code is not None:
 
         lat, lon = get_coordinates_from_zip(zip_code, country_code)
-        mandi = get_nearest_mandi(lat, lon)
+        mandi = get_nearest_mandi(lat, lon, crop=crop)
 
     if mandi is None:
         raise ValueError("Either mandi or zip_code must be provided")
 
-    forecast = predict_next_days(crop, mandi, days)
+    crop, mandi, match_score = get_name_resolver().resolve(crop, mandi)
+
+    model_type = get_registry().resolve_model_type(crop, mandi, model_type)
+    forecast = predict_next_days(crop, mandi, days, model_type)
 
     latest_price = forecast[-1]["predicted_price"]
 
@@ -26,6 +32,9 @@ def get_price_intelligence(crop,
 
     return {
         "selected_mandi": mandi,
+        "crop": crop,
+        "name_match_score": match_score,
+        "model_type": model_type,
         "forecast": forecast,
         "export_analysis": export_info
     }
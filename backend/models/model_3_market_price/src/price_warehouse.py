@@ -0,0 +1,377 @@
+"""
+Local warehouse of mandi prices: the single read source for /market-live,
+the forecaster's price history and model training.
+
+Rows live in one SQLite table clustered on (commodity, market,
+arrival_date), so each series is stored contiguously and duplicates are
+impossible. A sync pulls from data.gov.in only the days from the stored
+watermark for that scope onwards, filtered upstream by arrival date.
+
+cleaned_data.csv is imported automatically the first time history is
+read, so syncing recent rows never hides the long history.
+
+From the repository root:
+    python -m backend.models.model_3_market_price.src.price_warehouse import [csv]
+    python -m backend.models.model_3_market_price.src.price_warehouse sync [--commodity Wheat]
+"""
+
+import argparse
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from .agmarknet_api import fetch_agmarknet_data
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+WAREHOUSE_PATH = os.path.join(BASE_DIR, "data", "warehouse", "prices.sqlite")
+CLEAN_PATH = os.path.join(BASE_DIR, "data", "processed", "cleaned_data.csv")
+
+# Columns of cleaned_data.csv, which every reader of price history expects
+HISTORY_COLUMNS = ["Commodity", "Market Name", "Price Date", "Modal_Price"]
+
+# A watermark further back than this is caught up with one unfiltered
+# fetch instead of one fetch per day
+MAX_CATCHUP_DAYS = int(os.getenv("PRICE_SYNC_MAX_CATCHUP_DAYS", "31"))
+
+IMPORT_SCOPE_PREFIX = "import:"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS prices (
+    commodity TEXT NOT NULL,
+    market TEXT NOT NULL,
+    arrival_date TEXT NOT NULL,
+    state TEXT,
+    modal_price REAL NOT NULL,
+    sync_id INTEGER NOT NULL,
+    PRIMARY KEY (commodity, market, arrival_date)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS prices_sync_id ON prices (sync_id);
+
+-- latest() matches names case and whitespace insensitively
+CREATE INDEX IF NOT EXISTS prices_series_key ON prices (lower(trim(commodity)), lower(trim(market)), arrival_date);
+
+CREATE TABLE IF NOT EXISTS sync_runs (
+    sync_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    scope TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    fetched INTEGER,
+    added INTEGER,
+    seconds REAL
+);
+
+CREATE TABLE IF NOT EXISTS watermarks (
+    scope TEXT PRIMARY KEY,
+    arrival_date TEXT NOT NULL
+);
+"""
+
+
+def normalize_name(name):
+    return " ".join(str(name).lower().split())
+
+
+def clean_name(name):
+    """
+    Name as stored: trimmed, with runs of whitespace collapsed, so
+    lower(trim(name)) in SQL agrees with normalize_name.
+    """
+    return " ".join(str(name).split())
+
+
+def sync_scope(commodity=None, market=None, state=None):
+    return "|".join(part or "*" for part in (commodity, market, state))
+
+
+class PriceWarehouse:
+
+    def __init__(self, path=WAREHOUSE_PATH):
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def __len__(self):
+        return self._query("SELECT COUNT(*) FROM prices")[0][0]
+
+    def last_sync_id(self):
+        return self._query("SELECT COALESCE(MAX(sync_id), 0) FROM sync_runs")[0][0]
+
+    def imported(self):
+        """
+        Whether a history CSV has ever been imported; syncs alone only
+        hold recent rows.
+        """
+        return self._query(
+            "SELECT COUNT(*) FROM sync_runs WHERE scope LIKE ?", (IMPORT_SCOPE_PREFIX + "%",)
+        )[0][0] > 0
+
+    def watermark(self, scope):
+        row = self._query("SELECT arrival_date FROM watermarks WHERE scope = ?", (scope,))
+        return row[0][0] if row else None
+
+    def ingest(self, df, scope):
+        """
+        Writes a frame with agmarknet_api columns (Commodity, Market, State,
+        Modal_Price, Price_Date) as one sync run. Rows already stored, and
+        rows without a positive modal price, are skipped. Returns
+        (sync_id, rows_added).
+        """
+
+        start = time.perf_counter()
+        fetched = len(df)
+
+        # A missing price must not be served as a live price of zero
+        prices = pd.to_numeric(df["Modal_Price"], errors="coerce")
+        df = df[prices > 0]
+
+        dates = pd.to_datetime(df["Price_Date"]).dt.strftime("%Y-%m-%d")
+        states = df["State"] if "State" in df.columns else pd.Series(None, index=df.index)
+
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO sync_runs (scope, started_at, fetched) VALUES (?, ?, ?)",
+                (scope, time.time(), fetched)
+            )
+            sync_id = cursor.lastrowid
+
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO prices VALUES (?, ?, ?, ?, ?, ?)",
+                zip(df["Commodity"].map(clean_name), df["Market"].map(clean_name), dates, states,
+                    df["Modal_Price"].astype(float), [sync_id] * len(df))
+            )
+            added = self._conn.total_changes - before
+
+            if len(df):
+                self._conn.execute(
+                    """
+                    INSERT INTO watermarks VALUES (?, ?)
+                    ON CONFLICT (scope) DO UPDATE SET arrival_date = MAX(arrival_date, excluded.arrival_date)
+                    """,
+                    (scope, dates.max())
+                )
+
+            self._conn.execute(
+                "UPDATE sync_runs SET added = ?, seconds = ? WHERE sync_id = ?",
+                (added, time.perf_counter() - start, sync_id)
+            )
+            self._conn.commit()
+
+        return sync_id, added
+
+    def import_history_csv(self, path=CLEAN_PATH):
+        """
+        Seeds the warehouse from a cleaned_data.csv style file.
+        """
+
+        df = pd.read_csv(path)
+        df = pd.DataFrame({
+            "Commodity": df["Commodity"],
+            "Market": df["Market Name"],
+            "Modal_Price": df["Modal_Price"],
+            "Price_Date": pd.to_datetime(df["Price Date"])
+        })
+
+        return self.ingest(df, IMPORT_SCOPE_PREFIX + os.path.basename(path))
+
+    def latest(self, commodity, market, state=None, start_date=None, end_date=None):
+        """
+        Most recent row of a series (optionally within [start_date,
+        end_date], ISO dates), or None. Names match regardless of case
+        and surrounding or repeated whitespace.
+        """
+
+        sql = (
+            "SELECT commodity, market, state, modal_price, arrival_date FROM prices"
+            " WHERE lower(trim(commodity)) = ? AND lower(trim(market)) = ?"
+        )
+        params = [normalize_name(commodity), normalize_name(market)]
+
+        if state:
+            # Rows imported from cleaned_data.csv carry no state
+            sql += " AND (state = ? OR state IS NULL)"
+            params.append(state)
+        if start_date:
+            sql += " AND arrival_date >= ?"
+            params.append(start_date)
+        if end_date:
+            sql += " AND arrival_date <= ?"
+            params.append(end_date)
+
+        rows = self._query(sql + " ORDER BY arrival_date DESC LIMIT 1", params)
+
+        if not rows:
+            return None
+
+        commodity, market, state, modal_price, arrival_date = rows[0]
+
+        return {
+            "Commodity": commodity,
+            "Market": market,
+            "State": state,
+            "Modal_Price": modal_price,
+            "Price_Date": pd.Timestamp(arrival_date)
+        }
+
+    def read_history(self, commodity=None, market=None, after_sync_id=None):
+        """
+        Price history in cleaned_data.csv columns. after_sync_id restricts
+        it to rows added by later sync runs, for incremental consumers.
+        """
+
+        sql = "SELECT commodity, market, arrival_date, modal_price FROM prices WHERE 1 = 1"
+        params = []
+
+        if commodity:
+            sql += " AND commodity = ?"
+            params.append(commodity)
+        if market:
+            sql += " AND market = ?"
+            params.append(market)
+        if after_sync_id is not None:
+            sql += " AND sync_id > ?"
+            params.append(after_sync_id)
+
+        df = pd.DataFrame(self._query(sql, params), columns=HISTORY_COLUMNS)
+        df["Price Date"] = pd.to_datetime(df["Price Date"])
+
+        return df
+
+    def market_states(self):
+        """
+        {market: state} for every market whose state is known.
+        """
+        return dict(self._query(
+            "SELECT market, MAX(state) FROM prices WHERE state IS NOT NULL GROUP BY market"
+        ))
+
+    def sync(self, commodity=None, market=None, state=None):
+        """
+        Pulls the scope from data.gov.in and stores rows from its watermark
+        day onwards (late rows for that day included; duplicates are
+        ignored). Once a watermark exists only the missing days are
+        requested, one API-filtered fetch per day. Returns a summary of
+        the run.
+        """
+
+        scope = sync_scope(commodity, market, state)
+        watermark = self.watermark(scope)
+
+        start = time.perf_counter()
+
+        days = []
+        if watermark is not None:
+            days = pd.date_range(pd.Timestamp(watermark), pd.Timestamp.today().normalize())
+            if len(days) > MAX_CATCHUP_DAYS:
+                days = []
+
+        if not len(days):
+            df = fetch_agmarknet_data(commodity=commodity, market=market, state=state)
+        else:
+            df = pd.concat([
+                fetch_agmarknet_data(commodity=commodity, market=market, state=state, arrival_date=day)
+                for day in days
+            ], ignore_index=True)
+
+        fetch_seconds = time.perf_counter() - start
+
+        if watermark is not None:
+            df = df[df["Price_Date"] >= pd.Timestamp(watermark)]
+
+        sync_id, added = self.ingest(df, scope)
+
+        return {
+            "sync_id": sync_id,
+            "scope": scope,
+            "previous_watermark": watermark,
+            "watermark": self.watermark(scope),
+            "days_requested": len(days) or None,
+            "new_rows": len(df),
+            "added": added,
+            "fetch_seconds": round(fetch_seconds, 3)
+        }
+
+
+_warehouse = None
+_warehouse_lock = threading.Lock()
+
+
+def get_warehouse():
+
+    global _warehouse
+
+    if _warehouse is None:
+        with _warehouse_lock:
+            if _warehouse is None:
+                _warehouse = PriceWarehouse()
+
+    return _warehouse
+
+
+_import_lock = threading.Lock()
+
+
+def ensure_history_imported(warehouse=None, path=None):
+    """
+    Seeds the warehouse from cleaned_data.csv unless a history import has
+    already been recorded.
+    """
+
+    warehouse = warehouse or get_warehouse()
+    path = path or CLEAN_PATH
+
+    if warehouse.imported() or not os.path.exists(path):
+        return
+
+    with _import_lock:
+        if not warehouse.imported():
+            _, added = warehouse.import_history_csv(path)
+            print(f" Seeded the price warehouse with {added} rows from {path}")
+
+
+def load_price_history():
+    """
+    Full price history for the forecaster and training, read from the
+    warehouse (seeded from cleaned_data.csv on first use).
+    """
+
+    warehouse = get_warehouse()
+    ensure_history_imported(warehouse)
+
+    return warehouse.read_history()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local mandi price warehouse")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = sub.add_parser("import", help="seed from a cleaned_data.csv style file")
+    import_parser.add_argument("csv", nargs="?", default=CLEAN_PATH)
+
+    sync_parser = sub.add_parser("sync", help="pull rows from the watermark day onwards from data.gov.in")
+    sync_parser.add_argument("--commodity")
+    sync_parser.add_argument("--market")
+    sync_parser.add_argument("--state")
+
+    args = parser.parse_args()
+    warehouse = get_warehouse()
+
+    if args.command == "import":
+        sync_id, added = warehouse.import_history_csv(args.csv)
+        print(f"Imported {added} rows (sync {sync_id})")
+    else:
+        print(warehouse.sync(commodity=args.commodity, market=args.market, state=args.state))
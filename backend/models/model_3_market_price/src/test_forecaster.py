@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from backend.models.common.forest_runtime import ForestBundle, compile_model
+from backend.models.model_3_market_price.src.forecaster import (
+    QUANTILES,
+    calendar_features,
+    forecast_recursive,
+    forecast_recursive_batch
+)
+
+
+def train_forest(seed):
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.uniform(1000, 3000, (400, 3)),
+        rng.integers(1, 13, 400),
+        rng.integers(0, 7, 400)
+    ])
+    y = X[:, :3].mean(axis=1) + X[:, 3] * 20 - X[:, 4] * 15 + rng.normal(0, 30, 400)
+    return RandomForestRegressor(n_estimators=15, max_depth=8, random_state=seed).fit(X, y)
+
+
+def dataframe_loop(model, recent_prices, last_date, days):
+    """
+    The original predict_next_days loop: one DataFrame row per step.
+    """
+
+    temp_df = pd.DataFrame({
+        "Price Date": pd.date_range(end=last_date, periods=len(recent_prices)),
+        "Modal_Price": recent_prices
+    })
+    predictions = []
+
+    for _ in range(days):
+        last3 = temp_df.tail(3)
+        next_date = pd.to_datetime(last3.iloc[-1]["Price Date"]) + pd.Timedelta(days=1)
+
+        X = [[last3.iloc[-1]["Modal_Price"], last3.iloc[-2]["Modal_Price"], last3.iloc[-3]["Modal_Price"],
+              next_date.month, next_date.dayofweek]]
+        next_price = float(model.predict(X)[0])
+
+        predictions.append((str(next_date.date()), next_price))
+        temp_df = pd.concat([temp_df, pd.DataFrame([{"Price Date": next_date, "Modal_Price": next_price}])],
+                            ignore_index=True)
+
+    return predictions
+
+
+def test_calendar_features_match_pandas():
+
+    # Crosses month, year and leap-day boundaries, and dates before 1970
+    dates = pd.date_range("1969-12-25", "1970-01-10").append(pd.date_range("2023-12-20", "2024-03-05"))
+
+    months, days_of_week = calendar_features(dates.to_numpy().astype("datetime64[D]"))
+
+    assert np.array_equal(months, dates.month)
+    assert np.array_equal(days_of_week, dates.dayofweek)
+
+
+@pytest.mark.parametrize("last_date", ["2023-12-27", "2024-02-26"])
+def test_matches_dataframe_loop(last_date):
+
+    forest = train_forest(0)
+    recent_prices = [2100.0, 2150.0, 2080.0]
+
+    expected = dataframe_loop(forest, recent_prices, pd.Timestamp(last_date), 10)
+
+    for model in (forest, compile_model(forest)):
+        dates, prices = forecast_recursive(model, recent_prices, np.datetime64(last_date), 10)
+
+        assert [str(date) for date in dates] == [date for date, _ in expected]
+        assert np.allclose(prices, [price for _, price in expected])
+
+
+def test_bands_keep_the_point_forecast():
+
+    model = compile_model(train_forest(0))
+
+    _, point = forecast_recursive(model, [2100.0, 2150.0, 2080.0], np.datetime64("2024-01-01"), 7)
+    _, banded, bands = forecast_recursive(model, [2100.0, 2150.0, 2080.0], np.datetime64("2024-01-01"), 7, QUANTILES)
+
+    assert np.array_equal(point, banded)
+    assert bands.shape == (7, len(QUANTILES))
+    assert np.all(bands[:, 0] <= bands[:, -1])
+
+
+def test_batch_matches_single_series():
+
+    forests = [compile_model(train_forest(seed)) for seed in range(3)]
+    bundle = ForestBundle(forests)
+
+    recent = np.array([[2100.0, 2150.0, 2080.0], [1500.0, 1490.0, 1510.0], [2800.0, 2750.0, 2900.0]])
+    last_dates = np.array(["2024-02-27", "2023-12-30", "2024-06-15"], dtype="datetime64[D]")
+    ids = np.array([2, 0, 1])
+
+    dates, prices, bands = forecast_recursive_batch(bundle, ids, recent, last_dates, 5, QUANTILES)
+
+    for i in range(len(ids)):
+        expected_dates, expected_prices, expected_bands = forecast_recursive(
+            forests[ids[i]], recent[i], last_dates[i], 5, QUANTILES
+        )
+        assert np.array_equal(dates[i], expected_dates)
+        assert np.allclose(prices[i], expected_prices)
+        assert np.allclose(bands[i], expected_bands)
+
+
+@pytest.mark.parametrize("days", [0, -3])
+def test_non_positive_horizon_is_empty(days):
+
+    model = compile_model(train_forest(0))
+
+    dates, prices = forecast_recursive(model, [2100.0, 2150.0, 2080.0], np.datetime64("2024-01-01"), days)
+    assert len(dates) == len(prices) == 0
+
+    _, prices = forecast_recursive_batch(ForestBundle([model]), np.array([0]), [[2100.0, 2150.0, 2080.0]],
+                                         np.array(["2024-01-01"], dtype="datetime64[D]"), days)
+    assert prices.shape == (1, 0)
@@ -0,0 +1,120 @@
+import json
+import os
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from backend.models.model_3_market_price.src.model_registry import MarketModelRegistry, model_file_name
+
+
+def train_forest(offset):
+    X = np.random.RandomState(0).rand(50, 5)
+    forest = RandomForestRegressor(n_estimators=5, max_depth=4, random_state=0)
+    return forest.fit(X, X[:, 0] * 100 + offset)
+
+
+def save_forest(model_dir, offset, mtime):
+    path = os.path.join(model_dir, model_file_name("Wheat", "Rampur"))
+    joblib.dump(train_forest(offset), path)
+    os.utime(path, (mtime, mtime))
+
+
+def make_registry(model_dir):
+    return MarketModelRegistry(model_dir=str(model_dir), archive_path=None, global_model_path=None)
+
+
+def test_retrained_model_replaces_cached_one(tmp_path):
+
+    row = np.full((1, 5), 0.5)
+
+    save_forest(tmp_path, 0, 1_000_000)
+    registry = make_registry(tmp_path)
+
+    before = registry.get("Wheat", "Rampur", "mandi").predict(row)[0]
+    assert registry.get("Wheat", "Rampur", "mandi").predict(row)[0] == before
+    version = registry.model_version("Wheat", "Rampur", "mandi")
+
+    save_forest(tmp_path, 1000, 2_000_000)
+
+    assert registry.model_version("Wheat", "Rampur", "mandi") != version
+    after = registry.get("Wheat", "Rampur", "mandi").predict(row)[0]
+
+    assert after - before > 900
+    assert registry.stats()["cached_models"] == 1
+    assert registry.stats()["loads"] == 2
+
+
+def test_retrained_model_replaces_pinned_one(tmp_path):
+
+    row = np.full((1, 5), 0.5)
+
+    save_forest(tmp_path, 0, 1_000_000)
+    registry = make_registry(tmp_path)
+    registry.pin("Wheat", "Rampur")
+
+    before = registry.get("Wheat", "Rampur", "mandi").predict(row)[0]
+
+    save_forest(tmp_path, 1000, 2_000_000)
+    after = registry.get("Wheat", "Rampur", "mandi").predict(row)[0]
+
+    assert after - before > 900
+    assert registry.stats()["pinned_models"] == 1
+    assert registry.stats()["cached_models"] == 0
+
+
+def test_global_model_reloads_when_encodings_change(tmp_path):
+
+    model_path = os.path.join(tmp_path, "global_price_model.pkl")
+    encodings_path = os.path.join(tmp_path, "encodings.json")
+
+    X = np.random.RandomState(0).rand(50, 8)
+    forest = RandomForestRegressor(n_estimators=5, max_depth=4, random_state=0).fit(X, X[:, 5] * 100)
+    joblib.dump(forest, model_path)
+
+    def save_encodings(mandis, mtime):
+        with open(encodings_path, "w") as f:
+            json.dump({"crops": ["wheat"], "mandis": mandis, "mandi_states": {}}, f)
+        os.utime(encodings_path, (mtime, mtime))
+
+    save_encodings(["rampur"], 1_000_000)
+
+    registry = MarketModelRegistry(model_dir=str(tmp_path), archive_path=None,
+                                   global_model_path=model_path, global_encodings_path=encodings_path)
+
+    version = registry.model_version("Wheat", "Rampur", "global")
+    assert registry.get("Wheat", "Rampur", "global").codes[1] == 0
+
+    save_encodings(["raipur", "rampur"], 2_000_000)
+
+    assert registry.model_version("Wheat", "Rampur", "global") != version
+    assert registry.get("Wheat", "Rampur", "global").codes[1] == 1
+    assert registry.stats()["loads"] == 2
+
+
+def test_model_trained_after_startup_is_found(tmp_path):
+
+    registry = make_registry(tmp_path)
+
+    assert not registry.has_model("Wheat", "Rampur")
+    with pytest.raises(ValueError):
+        registry.model_path("Wheat", "Rampur")
+
+    save_forest(tmp_path, 0, 1_000_000)
+
+    assert registry.has_model("Wheat", "Rampur")
+    assert registry.get("Wheat", "Rampur", "mandi").predict(np.full((1, 5), 0.5)).shape == (1,)
+
+
+def test_deleted_model_is_not_found(tmp_path):
+
+    save_forest(tmp_path, 0, 1_000_000)
+    registry = make_registry(tmp_path)
+
+    os.remove(os.path.join(tmp_path, model_file_name("Wheat", "Rampur")))
+
+    with pytest.raises(ValueError, match="Model not found"):
+        registry.get("Wheat", "Rampur", "mandi")
+    with pytest.raises(ValueError, match="Model not found"):
+        registry.model_version("Wheat", "Rampur", "mandi")
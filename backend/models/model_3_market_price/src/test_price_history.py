@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+from backend.models.model_3_market_price.src.price_history import PriceHistoryStore, PriceSeries
+
+
+def days(*offsets, start="2024-01-01"):
+    return np.datetime64(start) + np.array(offsets)
+
+
+def test_out_of_order_append_is_sorted_and_keeps_only_newer_dates():
+
+    series = PriceSeries("Wheat", "Rampur", days(0, 1, 2), [10.0, 11.0, 12.0])
+    version = series.data_version
+
+    # Day 1 is already stored; days 5, 3 and 4 arrive out of order
+    assert series.append(days(5, 1, 3, 4), [15.0, 99.0, 13.0, 14.0]) == 3
+
+    assert np.array_equal(series.dates, days(0, 1, 2, 3, 4, 5))
+    assert np.array_equal(series.prices, [10.0, 11.0, 12.0, 13.0, 14.0, 15.0])
+    assert series.data_version != version
+
+
+def test_duplicate_dates_are_ignored():
+
+    series = PriceSeries("Wheat", "Rampur", days(0, 1), [10.0, 11.0])
+    version = series.data_version
+
+    assert series.append(days(1, 0), [99.0, 99.0]) == 0
+    assert series.data_version == version
+    assert series.version == 0
+
+    # Repeated new dates: the first given is kept
+    assert series.append(days(2, 2, 3), [12.0, 99.0, 13.0]) == 2
+    assert np.array_equal(series.dates, days(0, 1, 2, 3))
+    assert np.array_equal(series.prices, [10.0, 11.0, 12.0, 13.0])
+
+
+def test_append_past_capacity():
+
+    series = PriceSeries("Wheat", "Rampur", days(0), [0.0])
+    capacity = len(series._dates)
+
+    versions = {series.data_version}
+    for day in range(1, capacity * 3):
+        assert series.append(days(day), [float(day)]) == 1
+        versions.add(series.data_version)
+
+    assert len(series._dates) > capacity
+    assert len(series) == capacity * 3
+    assert np.array_equal(series.dates, days(*range(capacity * 3)))
+    assert np.array_equal(series.prices, np.arange(capacity * 3, dtype=float))
+    assert len(versions) == capacity * 3
+
+    # A single append larger than the doubled capacity
+    assert series.append(days(*range(capacity * 3, capacity * 20)), np.zeros(capacity * 17)) == capacity * 17
+    assert len(series) == capacity * 20
+    assert series.last_date == days(capacity * 20 - 1)[0]
+
+
+def test_store_append_frame():
+
+    store = PriceHistoryStore.from_frame(pd.DataFrame({
+        "Commodity": ["Wheat", "Wheat"],
+        "Market Name": ["Rampur", "Rampur"],
+        "Price Date": ["2024-01-02", "2024-01-01"],
+        "Modal_Price": [11.0, 10.0]
+    }))
+    version = store.get_series("wheat", "RAMPUR").data_version
+
+    added = store.append_frame(pd.DataFrame({
+        "Commodity": ["Wheat", "Wheat", "Wheat", "Onion", "Onion"],
+        "Market Name": ["Rampur", "Rampur", "Rampur", "Agra", "Agra"],
+        "Price Date": ["2024-01-04", "2024-01-02", "2024-01-03", "2024-01-05", "2024-01-05"],
+        "Modal_Price": [14.0, 99.0, 13.0, 20.0, 21.0]
+    }))
+
+    assert added == 3
+    series = store.get_series("Wheat", "Rampur")
+    assert series.data_version != version
+    assert np.array_equal(series.prices, [10.0, 11.0, 13.0, 14.0])
+
+    onion = store.get_series("onion", "agra")
+    assert len(onion) == 1 and onion.prices[0] == 20.0
+    assert len(store) == 2
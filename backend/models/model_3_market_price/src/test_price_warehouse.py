@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from backend.models.model_3_market_price.src.agmarknet_api import records_to_frame
+from backend.models.model_3_market_price.src.price_warehouse import PriceWarehouse
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=["Commodity", "Market", "State", "Modal_Price", "Price_Date"])
+
+
+def test_latest_matches_names_regardless_of_case_and_whitespace(tmp_path):
+
+    warehouse = PriceWarehouse(str(tmp_path / "prices.sqlite"))
+    warehouse.ingest(frame([
+        ("Wheat", " Jhansi  (Grain) ", "Uttar Pradesh", 2100.0, pd.Timestamp("2024-01-01")),
+        ("Wheat", "Jhansi (Grain)", "Uttar Pradesh", 2150.0, pd.Timestamp("2024-01-02")),
+    ]), "test")
+
+    latest = warehouse.latest("  wheat", "JHANSI (grain)")
+
+    assert latest["Market"] == "Jhansi (Grain)"
+    assert latest["Modal_Price"] == 2150.0
+    assert latest["Price_Date"] == pd.Timestamp("2024-01-02")
+
+    assert warehouse.latest("Wheat", "Jhansi") is None
+
+
+def test_missing_and_zero_modal_prices_are_not_stored(tmp_path):
+
+    records = [
+        {"commodity": "Wheat", "market": "Agra", "state": "Uttar Pradesh", "modal_price": "2200", "arrival_date": "01/01/2024"},
+        {"commodity": "Wheat", "market": "Agra", "state": "Uttar Pradesh", "modal_price": "NR", "arrival_date": "02/01/2024"},
+        {"commodity": "Wheat", "market": "Agra", "state": "Uttar Pradesh", "modal_price": "0", "arrival_date": "03/01/2024"},
+    ]
+
+    df = records_to_frame(records)
+    assert np.isnan(df["Modal_Price"][1])
+
+    warehouse = PriceWarehouse(str(tmp_path / "prices.sqlite"))
+    _, added = warehouse.ingest(df, "test")
+
+    assert added == 1
+    assert warehouse.latest("Wheat", "Agra")["Modal_Price"] == 2200.0
+    assert warehouse.read_history()["Modal_Price"].tolist() == [2200.0]
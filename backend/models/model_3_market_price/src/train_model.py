@@ -1,60 +1,215 @@
 from sklearn.ensemble import RandomForestRegressor
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+import argparse
+import hashlib
+import json
 import pandas as pd
 import joblib
 import os
+import time
+
+from backend.models.model_3_market_price.src.model_registry import model_file_name
+from backend.models.model_3_market_price.src.price_warehouse import load_price_history
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
-CLEAN_PATH = os.path.join(BASE_DIR, "data", "processed", "cleaned_data.csv")
 MODEL_DIR = os.path.join(BASE_DIR, "models")
+MANIFEST_PATH = os.path.join(MODEL_DIR, "manifest.json")
 
-def train_all_models():
+MIN_ROWS = 60
+FEATURES = ["lag_1", "lag_2", "lag_3", "month", "day_of_week"]
 
-    df = pd.read_csv(CLEAN_PATH)
 
-    os.makedirs(MODEL_DIR, exist_ok=True)
+def build_lag_features(group):
 
-    grouped = df.groupby(["Commodity", "Market Name"])
+    group = group.sort_values("Price Date").copy()
 
-    total_models = 0
+    group["lag_1"] = group["Modal_Price"].shift(1)
+    group["lag_2"] = group["Modal_Price"].shift(2)
+    group["lag_3"] = group["Modal_Price"].shift(3)
 
-    for (crop, mandi), group in grouped:
+    group["month"] = pd.to_datetime(group["Price Date"]).dt.month
+    group["day_of_week"] = pd.to_datetime(group["Price Date"]).dt.dayofweek
 
-        group = group.sort_values("Price Date")
+    group.dropna(inplace=True)
 
-        # Skip small datasets
-        if len(group) < 60:
-            continue
+    return group
+
+
+def fingerprint(group):
+    """
+    Content hash of a series; a model is retrained only when it changes.
+    """
+    group = group.sort_values("Price Date")
+    digest = hashlib.sha256()
+    digest.update(",".join(group["Price Date"].astype(str)).encode("utf-8"))
+    digest.update(group["Modal_Price"].to_numpy(dtype="float64").tobytes())
+    return digest.hexdigest()
+
+
+def load_manifest(path=None):
+
+    path = path or MANIFEST_PATH
+
+    if not os.path.exists(path):
+        return {"models": {}}
+
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path=None):
+
+    path = path or MANIFEST_PATH
+    tmp_path = path + ".tmp"
+
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=4)
+
+    os.replace(tmp_path, path)
+
+
+def fit_series_model(group):
+    """
+    Fits the per-mandi forest on one series. Called from worker processes,
+    so the forest itself is fit single-threaded. Returns (model, lag rows).
+    """
 
-        group["lag_1"] = group["Modal_Price"].shift(1)
-        group["lag_2"] = group["Modal_Price"].shift(2)
-        group["lag_3"] = group["Modal_Price"].shift(3)
+    group = build_lag_features(group)
 
-        group["month"] = pd.to_datetime(group["Price Date"]).dt.month
-        group["day_of_week"] = pd.to_datetime(group["Price Date"]).dt.dayofweek
+    model = RandomForestRegressor(
+        n_estimators=100,
+        random_state=42,
+        n_jobs=1
+    )
 
-        group.dropna(inplace=True)
+    model.fit(group[FEATURES], group["Modal_Price"])
 
-        X = group[["lag_1", "lag_2", "lag_3", "month", "day_of_week"]]
-        y = group["Modal_Price"]
+    return model, group
 
-        model = RandomForestRegressor(
-            n_estimators=100,
-            random_state=42,
-            n_jobs=-1
-        )
 
-        model.fit(X, y)
+def train_series(group, model_path):
+    """
+    Trains and saves one (crop, mandi) model. Runs inside a worker process.
+    """
 
-        model_name = f"{crop}_{mandi}.pkl"
-        model_name = model_name.replace(" ", "_").replace("/", "_")
+    start = time.perf_counter()
 
-        joblib.dump(model, os.path.join(MODEL_DIR, model_name))
+    model, group = fit_series_model(group)
 
-        total_models += 1
-        print(f" Trained: {crop} - {mandi}")
+    # The registry reloads a model when its file changes, so a running
+    # server must never see it half-written
+    tmp_path = model_path + ".tmp"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, model_path)
 
-    print(f"\n Total models trained: {total_models}")
+    return len(group), time.perf_counter() - start
+
+
+def train_all_models(workers=None, force=False):
+
+    run_start = time.perf_counter()
+
+    df = load_price_history()
+
+    os.makedirs(MODEL_DIR, exist_ok=True)
+
+    manifest = load_manifest()
+    entries = manifest.setdefault("models", {})
+
+    jobs = []
+    skipped_small = 0
+    unchanged = 0
+
+    for (crop, mandi), group in df.groupby(["Commodity", "Market Name"]):
+
+        # Skip small datasets
+        if len(group) < MIN_ROWS:
+            skipped_small += 1
+            continue
+
+        model_name = model_file_name(crop, mandi)
+        model_path = os.path.join(MODEL_DIR, model_name)
+        group_fingerprint = fingerprint(group)
+
+        entry = entries.get(model_name)
+        if (not force and entry is not None
+                and entry["fingerprint"] == group_fingerprint
+                and os.path.exists(model_path)):
+            unchanged += 1
+            continue
+
+        jobs.append((crop, mandi, model_name, model_path, group_fingerprint,
+                     group[["Price Date", "Modal_Price"]]))
+
+    trained = 0
+    failures = {}
+
+    # The manifest is saved even if the run is interrupted, so series that
+    # did train aren't retrained next time
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+
+            futures = {
+                pool.submit(train_series, group, model_path): (crop, mandi, model_name, group_fingerprint)
+                for crop, mandi, model_name, model_path, group_fingerprint, group in jobs
+            }
+
+            for future in as_completed(futures):
+                crop, mandi, model_name, group_fingerprint = futures[future]
+
+                # A failed series keeps its previous manifest entry (if
+                # any), so its changed fingerprint retries it next run
+                try:
+                    rows, seconds = future.result()
+                except Exception as e:
+                    failures[model_name] = f"{type(e).__name__}: {e}"
+                    print(f" Failed: {crop} - {mandi} ({failures[model_name]})")
+                    continue
+
+                previous = entries.get(model_name, {})
+                entries[model_name] = {
+                    "crop": crop,
+                    "mandi": mandi,
+                    "version": previous.get("version", 0) + 1,
+                    "fingerprint": group_fingerprint,
+                    "rows": rows,
+                    "train_seconds": round(seconds, 3),
+                    "trained_at": datetime.now().isoformat(timespec="seconds")
+                }
+
+                trained += 1
+                print(f" Trained: {crop} - {mandi} ({rows} rows, {seconds:.2f}s)")
+
+    finally:
+        wall_clock = time.perf_counter() - run_start
+
+        manifest["last_run"] = {
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "wall_clock_seconds": round(wall_clock, 2),
+            "trained": trained,
+            "failed": len(failures),
+            "failures": failures,
+            "unchanged": unchanged,
+            "skipped_small": skipped_small,
+            "workers": workers or os.cpu_count()
+        }
+
+        save_manifest(manifest)
+
+    print(f"\n Total models trained: {trained}")
+    print(f" Failed: {len(failures)}")
+    print(f" Unchanged (skipped): {unchanged}")
+    print(f" Too small (<{MIN_ROWS} rows): {skipped_small}")
+    print(f" Wall-clock time: {wall_clock:.1f}s")
+
+    return manifest["last_run"]
 
 
 if __name__ == "__main__":
-    train_all_models()
+    parser = argparse.ArgumentParser(description="Retrain per-mandi price models")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--force", action="store_true", help="retrain every series, even unchanged ones")
+    args = parser.parse_args()
+
+    train_all_models(workers=args.workers, force=args.force)
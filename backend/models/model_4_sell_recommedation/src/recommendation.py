@@ -1,25 +1,45 @@
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+
 from backend.models.model_3_market_price.src.price_intelligence import get_price_intelligence
-from backend.models.model_2_agro_impact.src.predict_impact import predict_agro_impact
+from backend.models.model_3_market_price.src.location_resolver import get_coordinates_from_zip
+from backend.models.model_3_market_price.src.mandi_selector import get_nearest_mandi
+from backend.models.model_3_market_price.src.name_resolver import get_name_resolver
+from backend.models.model_2_agro_impact.src.predict_impact import predict_agro_impact, predict_agro_impact_batch
 
 from backend.models.model_4_sell_recommedation.src.trend_analysis import analyze_price_trend
 from backend.models.model_4_sell_recommedation.src.volatility_analysis import analyze_volatility
 from backend.models.model_4_sell_recommedation.src.storage_risk import evaluate_storage_risk
 from backend.models.model_4_sell_recommedation.src.confidence_score import calculate_confidence
 from backend.models.model_4_sell_recommedation.src.sell_decision_engine import decide_sell_action
+from backend.models.model_4_sell_recommedation.src.stage_graph import StageGraph, get_stage_executor
 
+# Items accepted by one batch request
+MAX_BATCH_ITEMS = int(os.getenv("SELL_BATCH_MAX_ITEMS", "100"))
 
-def get_sell_recommendation(crop,
-                            mandi=None,
-                            zip_code=None,
-                            days=7,
-                            weather_input=None):
+# Tasks (geocodes, forecasts, weather scoring) one batch may have on the
+# shared stage executor at once
+BATCH_IN_FLIGHT = int(os.getenv("SELL_BATCH_IN_FLIGHT", "4"))
 
-    price_data = get_price_intelligence(
-        crop=crop,
-        mandi=mandi,
-        zip_code=zip_code,
-        days=days
-    )
+
+def select_mandi(crop, mandi, location):
+
+    if mandi is not None:
+        return mandi
+
+    if location is None:
+        raise ValueError("Either mandi or zip_code must be provided")
+
+    return get_nearest_mandi(*location, crop=crop)
+
+
+def build_recommendation(price_data, weather_output, storage_risk):
+    """
+    Combines the price and agro-impact branches into the final response.
+    """
 
     forecast = price_data["forecast"]
     export_info = price_data["export_analysis"]
@@ -28,18 +48,14 @@ def get_sell_recommendation(crop,
 
     volatility_info = analyze_volatility(forecast)
 
-    weather_output = predict_agro_impact(weather_input)
     weather_risk = weather_output["impact"]
 
-    storage_risk = evaluate_storage_risk(crop, days)
-
     decision = decide_sell_action(trend_info,
                                   volatility_info,
                                   weather_risk,
                                   storage_risk,
                                   export_info)
 
-    # Step 7: Confidence
     confidence = calculate_confidence(
         trend_info["momentum_score"],
         volatility_info["volatility_risk"],
@@ -47,7 +63,9 @@ def get_sell_recommendation(crop,
     )
 
     return {
+        "crop": price_data["crop"],
         "selected_mandi": price_data["selected_mandi"],
+        "name_match_score": price_data["name_match_score"],
         "trend_analysis": trend_info,
         "volatility_analysis": volatility_info,
         "weather_risk": weather_risk,
@@ -55,4 +73,231 @@ def get_sell_recommendation(crop,
         "export_analysis": export_info,
         "final_recommendation": decision,
         "confidence_score": confidence
-    }
\ No newline at end of file
+    }
+
+
+def get_sell_recommendation(crop,
+                            mandi=None,
+                            zip_code=None,
+                            days=7,
+                            weather_input=None):
+    """
+    Runs as a stage graph: the price branch (geocoding -> nearest mandi ->
+    forecast and export analysis) and the agro-impact branch are
+    independent and run concurrently, so latency follows the slower branch
+    rather than the sum of all stages. Per-stage timings are returned.
+    """
+
+    graph = StageGraph()
+
+    graph.add(
+        "location",
+        lambda: get_coordinates_from_zip(zip_code) if mandi is None and zip_code is not None else None
+    )
+    graph.add("mandi", lambda location: select_mandi(crop, mandi, location), deps=["location"], inline=True)
+    graph.add("price", lambda selected: get_price_intelligence(crop=crop, mandi=selected, days=days), deps=["mandi"])
+    graph.add("agro_impact", lambda: predict_agro_impact(weather_input))
+    graph.add("storage_risk", lambda: evaluate_storage_risk(crop, days), inline=True)
+    graph.add(
+        "recommendation",
+        build_recommendation,
+        deps=["price", "agro_impact", "storage_risk"],
+        inline=True
+    )
+
+    results, timings = graph.run(get_stage_executor())
+
+    return {
+        **results["recommendation"],
+        "stage_timings_ms": {
+            name: round(seconds * 1000, 2) for name, seconds in timings.items()
+        }
+    }
+
+
+def weather_key(weather_input):
+    return json.dumps(weather_input, sort_keys=True, default=str)
+
+
+def score_weather(records):
+    """
+    Agro impact of every distinct weather input in one forest pass. If the
+    batch fails, inputs are scored one by one so only the bad ones error.
+    """
+
+    try:
+        return predict_agro_impact_batch(records)
+    except Exception:
+        results = []
+        for record in records:
+            try:
+                results.append(predict_agro_impact(record))
+            except Exception as e:
+                results.append(e)
+        return results
+
+
+def get_sell_recommendations_batch(items):
+    """
+    Recommendations for many (crop, mandi or zip_code, days, weather_input)
+    items, sharing work between them: each ZIP code is geocoded once, each
+    distinct (crop, mandi, days) forecast is computed once, and all
+    distinct weather inputs are scored in a single agro-impact batch.
+
+    At most BATCH_IN_FLIGHT of a batch's tasks are on the shared stage
+    executor at a time, so one large batch can't starve single requests.
+
+    A generator: yields {"index": i, ...recommendation} (or {"index": i,
+    "error": ...}) as soon as that item's own location, forecast and
+    weather score are in, then a summary row. Closing it early (e.g. the
+    client disconnected) cancels the work not yet started.
+    """
+
+    start = time.perf_counter()
+    executor = get_stage_executor()
+    items = list(items)
+
+    weather_keys = [weather_key(item.get("weather_input")) for item in items]
+    weather_inputs = {}
+    for key, item in zip(weather_keys, items):
+        weather_inputs.setdefault(key, item.get("weather_input"))
+
+    # Tasks waiting for a slot, taken in this order: forecasts before
+    # geocodes, since a finished forecast can be yielded right away
+    queued = {"agro": deque(), "forecast": deque(), "location": deque()}
+    running = {}  # future -> (kind, argument)
+
+    zip_items = {}  # zip code -> item indexes waiting for its location
+    waiting = {}  # (crop, mandi, days) after name resolution -> item indexes not yet yielded
+    forecasts = {}  # (crop, mandi, days) -> price data or the exception it raised
+    storage_risks = {}
+    match_scores = {}
+    state = {"agro": None}
+
+    def fill():
+        while len(running) < BATCH_IN_FLIGHT:
+            kind = next((kind for kind, tasks in queued.items() if tasks), None)
+            if kind is None:
+                return
+            argument = queued[kind].popleft()
+            if kind == "agro":
+                future = executor.submit(score_weather, list(weather_inputs.values()))
+            elif kind == "location":
+                future = executor.submit(get_coordinates_from_zip, argument)
+            else:
+                crop, mandi, days = argument
+                future = executor.submit(get_price_intelligence, crop=crop, mandi=mandi, days=days)
+            running[future] = (kind, argument)
+
+    def recommendation(index, key):
+
+        price_data = forecasts[key]
+        weather_output = state["agro"][weather_keys[index]]
+
+        for failed in (price_data, weather_output):
+            if isinstance(failed, Exception):
+                return {"index": index, "error": str(failed)}
+
+        if key not in storage_risks:
+            storage_risks[key] = evaluate_storage_risk(key[0], key[2])
+
+        return {
+            "index": index,
+            **build_recommendation(price_data, weather_output, storage_risks[key]),
+            # The forecast was requested with the resolved names; report
+            # how closely this item's own spelling matched them
+            "name_match_score": match_scores[index]
+        }
+
+    def ready(key):
+        """
+        Rows for the items waiting on key, once its forecast and the
+        weather scores are both in.
+        """
+        if key not in forecasts or state["agro"] is None:
+            return []
+        return [recommendation(index, key) for index in waiting.pop(key, [])]
+
+    def resolve(index, location):
+
+        item = items[index]
+
+        try:
+            selected = select_mandi(item["crop"], item.get("mandi"), location)
+            crop, selected, match_scores[index] = get_name_resolver().resolve(item["crop"], selected)
+        except Exception as e:
+            return [{"index": index, "error": str(e)}]
+
+        key = (crop, selected, item.get("days", 7))
+
+        # Forecasts are queued as soon as their first item is resolved
+        if key not in waiting and key not in forecasts:
+            queued["forecast"].append(key)
+
+        waiting.setdefault(key, []).append(index)
+
+        return ready(key)
+
+    try:
+        queued["agro"].append(None)
+
+        for index, item in enumerate(items):
+            zip_code = item.get("zip_code")
+
+            if item.get("mandi") is None and zip_code is not None:
+                if zip_code not in zip_items:
+                    zip_items[zip_code] = []
+                    queued["location"].append(zip_code)
+                zip_items[zip_code].append(index)
+            else:
+                yield from resolve(index, None)
+
+            fill()
+
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                kind, argument = running.pop(future)
+
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = e
+
+                if kind == "agro":
+                    if isinstance(result, Exception):
+                        result = [result] * len(weather_inputs)
+                    state["agro"] = dict(zip(weather_inputs, result))
+                    for key in list(forecasts):
+                        yield from ready(key)
+
+                elif kind == "location":
+                    for index in zip_items[argument]:
+                        if isinstance(result, Exception):
+                            yield {"index": index, "error": str(result)}
+                        else:
+                            yield from resolve(index, result)
+
+                else:
+                    forecasts[argument] = result
+                    yield from ready(argument)
+
+            fill()
+
+    finally:
+        # Only reached with work left when the consumer stopped early
+        for tasks in queued.values():
+            tasks.clear()
+        for future in running:
+            future.cancel()
+
+    yield {
+        "summary": {
+            "items": len(items),
+            "locations": len(zip_items),
+            "forecasts": len(forecasts),
+            "weather_inputs": len(weather_inputs),
+            "total_ms": round((time.perf_counter() - start) * 1000, 2)
+        }
+    }
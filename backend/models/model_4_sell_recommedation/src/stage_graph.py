@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Threads shared by every recommendation's independent stages
+STAGE_WORKERS = int(os.getenv("SELL_STAGE_WORKERS", "8"))
+
+
+def _timed_call(fn, args):
+    start = time.perf_counter()
+    value = fn(*args)
+    return value, time.perf_counter() - start
+
+
+class StageGraph:
+    """
+    A small dependency graph of named stages. A stage is called with the
+    results of its dependencies, in order, as soon as they are all done;
+    stages whose dependencies are met at the same time run concurrently
+    on the executor. Inline stages (cheap, CPU-only) run on the calling
+    thread instead.
+
+    Only the calling thread waits, so graphs can share one executor
+    without pool threads blocking on each other.
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, name, fn, deps=(), inline=False):
+        self.stages[name] = (fn, tuple(deps), inline)
+        return self
+
+    def run(self, executor):
+        """
+        Returns (results, timings): results by stage name, and per-stage
+        seconds plus "total" (wall clock) and "critical_path" (the slowest
+        dependency chain, which total should be close to).
+        """
+
+        start = time.perf_counter()
+
+        pending = dict(self.stages)
+        running = {}
+        results = {}
+        timings = {}
+        order = []
+
+        while pending or running:
+
+            ready = [
+                name for name, (_, deps, _) in pending.items()
+                if all(dep in results for dep in deps)
+            ]
+
+            ran_inline = False
+
+            for name in ready:
+                fn, deps, inline = pending.pop(name)
+                args = [results[dep] for dep in deps]
+
+                if inline:
+                    results[name], timings[name] = _timed_call(fn, args)
+                    order.append(name)
+                    ran_inline = True
+                else:
+                    running[executor.submit(_timed_call, fn, args)] = name
+
+            if ran_inline:
+                continue
+
+            if not running:
+                raise ValueError(f"Stages with unknown or circular dependencies: {', '.join(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                name = running.pop(future)
+                results[name], timings[name] = future.result()
+                order.append(name)
+
+        # A stage always completes after its dependencies
+        finish = {}
+        for name in order:
+            deps = self.stages[name][1]
+            finish[name] = timings[name] + max((finish[dep] for dep in deps), default=0.0)
+
+        timings["total"] = time.perf_counter() - start
+        timings["critical_path"] = max(finish.values(), default=0.0)
+
+        return results, timings
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_stage_executor():
+
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=STAGE_WORKERS, thread_name_prefix="sell-stage")
+
+    return _executor
@@ -1,10 +1,29 @@
 import numpy as np
 
+# Width of a normal distribution's 10th-90th percentile range, in standard deviations
+P10_P90_SIGMAS = 2.563
+
+
 def analyze_volatility(forecast):
+    """
+    Risk from how much prices may move: the std of the point forecasts,
+    or the std implied by the forecast's P10-P90 bands when present and
+    larger (point forecasts alone understate uncertainty). Both are in
+    price units, so the thresholds are shared.
+    """
 
     prices = [day["predicted_price"] for day in forecast]
 
     volatility = np.std(prices)
+    has_bands = bool(forecast) and "p10" in forecast[0]
+
+    if has_bands:
+
+        p10 = np.array([day["p10"] for day in forecast])
+        p90 = np.array([day["p90"] for day in forecast])
+
+        band_std = float(np.mean(p90 - p10)) / P10_P90_SIGMAS
+        volatility = max(volatility, band_std)
 
     if volatility > 200:
         risk = "high"
@@ -13,7 +32,15 @@ def analyze_volatility(forecast):
     else:
         risk = "low"
 
-    return {
+    result = {
         "volatility_value": round(float(volatility), 2),
         "volatility_risk": risk
-    }
\ No newline at end of file
+    }
+
+    if has_bands:
+        result["price_band"] = {
+            "p10": round(float(p10.min()), 2),
+            "p90": round(float(p90.max()), 2)
+        }
+
+    return result